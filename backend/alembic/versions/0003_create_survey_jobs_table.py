@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0003_create_survey_jobs_table"
+down_revision = "0002_add_survey_schema_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "survey_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("description_hash", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("survey_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_survey_jobs_description_hash", "survey_jobs", ["description_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_survey_jobs_description_hash", table_name="survey_jobs")
+    op.drop_table("survey_jobs")
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0004_add_survey_listing_indexes"
+down_revision = "0003_create_survey_jobs_table"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so large tables stay writable during the migration.
+    with op.get_context().autocommit_block():
+        # Keyset pagination on (created_at, id), optionally filtered by model.
+        op.create_index(
+            "ix_surveys_created_at_id",
+            "surveys",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_surveys_model_name_created_at_id",
+            "surveys",
+            ["model_name", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        # Containment filters on survey_json (questions[].type) use @>.
+        op.create_index(
+            "ix_surveys_survey_json_gin",
+            "surveys",
+            ["survey_json"],
+            postgresql_using="gin",
+            postgresql_ops={"survey_json": "jsonb_path_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_surveys_survey_json_gin",
+            "ix_surveys_model_name_created_at_id",
+            "ix_surveys_created_at_id",
+        ):
+            op.drop_index(name, table_name="surveys", postgresql_concurrently=True)
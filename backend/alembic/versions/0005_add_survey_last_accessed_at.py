@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_add_survey_last_accessed_at"
+down_revision = "0004_add_survey_listing_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Added without a default so existing rows are not rewritten (they stay
+    # NULL and fall back to created_at); new rows get now() from then on.
+    op.add_column(
+        "surveys",
+        sa.Column("last_accessed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.alter_column("surveys", "last_accessed_at", server_default=sa.func.now())
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_surveys_last_used",
+            "surveys",
+            [sa.text("coalesce(last_accessed_at, created_at)")],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_surveys_last_used", table_name="surveys", postgresql_concurrently=True
+        )
+    op.drop_column("surveys", "last_accessed_at")
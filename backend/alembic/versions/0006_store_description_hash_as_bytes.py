@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0006_store_description_hash_as_bytes"
+down_revision = "0005_add_survey_last_accessed_at"
+branch_labels = None
+depends_on = None
+
+# Ids are already native 16-byte uuid columns on Postgres; only the hex
+# SHA-256 hashes (64 chars + varlena header) become 32-byte bytea. The ALTER
+# rewrites each table and its indexes under an exclusive lock, so run it in
+# a maintenance window on large tables.
+TABLES = ("surveys", "survey_jobs")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN description_hash TYPE bytea "
+            "USING decode(description_hash, 'hex')"
+        )
+    op.create_check_constraint(
+        "ck_surveys_description_hash_length",
+        "surveys",
+        "octet_length(description_hash) = 32",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_surveys_description_hash_length", "surveys", type_="check")
+    for table in TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN description_hash TYPE varchar(64) "
+            "USING encode(description_hash, 'hex')"
+        )
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_add_survey_jobs_pending_unique_index"
+down_revision = "0006_store_description_hash_as_bytes"
+branch_labels = None
+depends_on = None
+
+PENDING = "status IN ('queued', 'running')"
+
+
+def upgrade() -> None:
+    # Keep the oldest pending job per brief; later duplicates can no longer
+    # exist once the index is in place.
+    op.execute(
+        "UPDATE survey_jobs SET status = 'failed', "
+        "error = 'Superseded by an identical job' "
+        "WHERE id IN ("
+        "SELECT id FROM ("
+        "SELECT id, row_number() OVER ("
+        "PARTITION BY description_hash ORDER BY created_at, id) AS n "
+        f"FROM survey_jobs WHERE {PENDING}) AS pending "
+        "WHERE n > 1)"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_survey_jobs_pending_description_hash",
+            "survey_jobs",
+            ["description_hash"],
+            unique=True,
+            postgresql_where=sa.text(PENDING),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_survey_jobs_pending_description_hash",
+            table_name="survey_jobs",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,75 @@
+"""Normalize legacy survey payloads to the current schema version.
+
+Usage: python -m app.cli.backfill [--batch-size 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionLocal
+from ..logging import setup_logging
+from ..models import Survey
+from ..schemas import SURVEY_SCHEMA_VERSION
+from ..services.survey_service import normalize_survey_payload, with_survey_id
+
+logger = structlog.get_logger(__name__)
+
+
+async def backfill(
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    batch_size: int = 500,
+) -> dict[str, int]:
+    """Rewrite rows below SURVEY_SCHEMA_VERSION in id order, one batch per commit.
+
+    Rows that cannot be normalized are left untouched and counted as failed.
+    """
+    updated = failed = 0
+    last_id = None
+    while True:
+        async with session_factory() as session:
+            stmt = (
+                select(Survey)
+                .where(Survey.schema_version < SURVEY_SCHEMA_VERSION)
+                .order_by(Survey.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(Survey.id > last_id)
+            rows = (await session.execute(stmt)).scalars().all()
+            if not rows:
+                break
+            for survey in rows:
+                try:
+                    payload = normalize_survey_payload(
+                        survey.survey_json, survey.description
+                    )
+                except Exception as exc:
+                    failed += 1
+                    logger.warning("backfill_failed", id=str(survey.id), error=str(exc))
+                    continue
+                survey.survey_json = with_survey_id(payload, survey.id)
+                survey.schema_version = SURVEY_SCHEMA_VERSION
+                updated += 1
+            await session.commit()
+            last_id = rows[-1].id
+            logger.info("backfill_batch", updated=updated, failed=failed)
+    return {"updated": updated, "failed": failed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    setup_logging()
+    result = asyncio.run(backfill(batch_size=args.batch_size))
+    logger.info("backfill_done", **result)
+
+
+if __name__ == "__main__":
+    main()
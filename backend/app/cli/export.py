@@ -0,0 +1,83 @@
+"""Export the surveys table as NDJSON.
+
+Usage: python -m app.cli.export surveys.ndjson [--gzip] [--from 2024-01-01]
+       python -m app.cli.export - --to 2024-07-01 > surveys.ndjson
+
+Rows are read through a server-side cursor and written as they arrive, so
+memory use does not grow with the table.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import BinaryIO
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionLocal
+from ..logging import setup_logging
+from ..services.export import iter_export_rows, iter_ndjson
+
+logger = structlog.get_logger(__name__)
+
+
+async def export(
+    output: BinaryIO,
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    compress: bool = False,
+    batch_size: int = 1000,
+) -> dict[str, int]:
+    """Write NDJSON (gzip-compressed with ``compress``) to ``output``."""
+    rows = 0
+
+    async def counted(source):
+        nonlocal rows
+        async for row in source:
+            rows += 1
+            yield row
+
+    written = 0
+    async with session_factory() as session:
+        source = iter_export_rows(session, created_from, created_to, batch_size)
+        async for chunk in iter_ndjson(counted(source), compress=compress):
+            output.write(chunk)
+            written += len(chunk)
+    output.flush()
+    return {"rows": rows, "bytes": written}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="output file, or - for stdout")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat)
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    setup_logging()
+
+    output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    try:
+        result = asyncio.run(
+            export(
+                output,
+                created_from=args.created_from,
+                created_to=args.created_to,
+                compress=args.gzip,
+                batch_size=args.batch_size,
+            )
+        )
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    logger.info("export_done", **result)
+
+
+if __name__ == "__main__":
+    main()
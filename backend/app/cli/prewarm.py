@@ -0,0 +1,127 @@
+"""Pre-generate surveys for briefs known in advance.
+
+Usage: python -m app.cli.prewarm briefs.txt [--batch-size 100] [--concurrency 8]
+       cat briefs.txt | python -m app.cli.prewarm -
+
+One brief per line; blank lines are ignored. Every batch is committed before
+the next one starts and briefs already stored are skipped, so an interrupted
+run is resumed by running the same command again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from itertools import islice
+from typing import Iterable, Iterator
+
+import structlog
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config import get_settings
+from ..db import AsyncSessionLocal
+from ..llm.providers import LLMProvider, close_llm_providers, get_llm_provider
+from ..logging import setup_logging
+from ..schemas import BriefText
+from ..services.survey_service import generate_or_get_surveys
+
+logger = structlog.get_logger(__name__)
+
+_brief = TypeAdapter(BriefText)
+
+
+def read_briefs(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        brief = line.strip()
+        if brief:
+            yield brief
+
+
+async def prewarm(
+    briefs: Iterable[str],
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    provider: LLMProvider | None = None,
+    batch_size: int = 100,
+    concurrency: int = 4,
+) -> dict[str, int | float]:
+    """Generate and store surveys for ``briefs`` that are not stored yet.
+
+    Each batch is looked up with one query, misses are generated with at most
+    ``concurrency`` provider calls in flight and written with one bulk insert
+    (see ``generate_or_get_surveys``).
+    """
+    provider = provider or get_llm_provider()
+    stats: dict[str, int | float] = {
+        "read": 0,
+        "created": 0,
+        "existing": 0,
+        "failed": 0,
+        "invalid": 0,
+    }
+    start = time.perf_counter()
+    briefs = iter(briefs)
+    while batch := list(islice(briefs, batch_size)):
+        stats["read"] += len(batch)
+        valid = []
+        for brief in batch:
+            try:
+                valid.append(_brief.validate_python(brief))
+            except ValidationError:
+                stats["invalid"] += 1
+        async with session_factory() as session:
+            results = await generate_or_get_surveys(
+                valid, session, provider, concurrency=concurrency
+            )
+        for result in results:
+            if result.survey is None:
+                stats["failed"] += 1
+                logger.warning(
+                    "prewarm_failed", description=result.description, error=result.error
+                )
+            elif result.cache_hit:
+                stats["existing"] += 1
+            else:
+                stats["created"] += 1
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "prewarm_progress",
+            **stats,
+            briefs_per_s=round(stats["read"] / elapsed, 1),
+            created_per_s=round(stats["created"] / elapsed, 2),
+        )
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+async def _run(args: argparse.Namespace) -> dict[str, int | float]:
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    try:
+        return await prewarm(
+            read_briefs(source),
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        await close_llm_providers()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="file with one brief per line, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--concurrency", type=int, default=get_settings().batch_concurrency
+    )
+    args = parser.parse_args()
+    setup_logging()
+    result = asyncio.run(_run(args))
+    logger.info("prewarm_done", **result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Prune cold surveys by last access time and/or table size.
+
+Usage: python -m app.cli.retention [--ttl-days 90] [--max-rows 1000000]
+       python -m app.cli.retention --ttl-days 90 --archive pruned.ndjson.gz
+
+Defaults come from SURVEY_RETENTION_TTL_SECONDS and SURVEY_RETENTION_MAX_ROWS.
+Rows are deleted in small batches, one transaction each; run it from cron.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+
+import orjson
+import structlog
+
+from ..config import get_settings
+from ..logging import setup_logging
+from ..services.retention import prune_surveys
+
+logger = structlog.get_logger(__name__)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--ttl-days",
+        type=float,
+        default=None,
+        help="prune surveys not read for this many days",
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=settings.survey_retention_max_rows,
+        help="then prune the coldest surveys down to this many rows",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.survey_retention_batch_size
+    )
+    parser.add_argument(
+        "--pause", type=float, default=0.0, help="seconds to sleep between batches"
+    )
+    parser.add_argument(
+        "--archive", help="append pruned rows as NDJSON (gzip if it ends in .gz)"
+    )
+    args = parser.parse_args()
+    setup_logging()
+
+    ttl_seconds = settings.survey_retention_ttl_seconds
+    if args.ttl_days is not None:
+        ttl_seconds = args.ttl_days * 86400
+    output = None
+    archive = None
+    if args.archive:
+        opener = gzip.open if args.archive.endswith(".gz") else open
+        output = opener(args.archive, "ab")
+
+        async def archive(rows: list[dict]) -> None:
+            output.write(
+                b"".join(
+                    orjson.dumps(row, option=orjson.OPT_NAIVE_UTC) + b"\n"
+                    for row in rows
+                )
+            )
+            output.flush()
+
+    try:
+        result = asyncio.run(
+            prune_surveys(
+                ttl_seconds=ttl_seconds,
+                max_rows=args.max_rows,
+                batch_size=args.batch_size,
+                pause=args.pause,
+                archive=archive,
+            )
+        )
+    finally:
+        if output is not None:
+            output.close()
+    logger.info("retention_done", **result)
+
+
+if __name__ == "__main__":
+    main()
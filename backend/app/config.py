@@ -1,24 +1,163 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import os
+import signal
+from typing import Callable, Dict, List
 
+import structlog
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application configuration loaded from environment variables."""
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
 
     database_url: str
+    database_read_replica_url: str | None = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_statement_cache_size: int = 500
     api_token: str | None = None
-    llm_provider: str = "mock"  # openai|openrouter|together|mock
+    admin_token: str | None = None  # unset disables the /admin endpoints
+    llm_provider: str = "mock"  # openai|openrouter|together|hedged|mock
     openai_api_key: str | None = None
     openrouter_api_key: str | None = None
     together_api_key: str | None = None
+    mock_latency_ms: float = 0.0
+    mock_jitter_ms: float = 0.0
+    llm_hedge_providers: List[str] = ["openai", "openrouter"]
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_delay: float = 2.0
+    llm_hedge_min_delay: float = 0.25
+    llm_http2: bool = False
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 30.0
+    llm_connect_timeout: float = 5.0
+    llm_read_timeout: float = 15.0
+    llm_write_timeout: float = 5.0
+    llm_pool_timeout: float = 5.0
+    llm_max_concurrency: int = 16
+    llm_max_queue: int = 64
+    llm_queue_timeout: float = 10.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_cooldown: float = 30.0
     rate_limit_per_min: int = 20
     cors_origins: List[str] = ["*"]
+    batch_concurrency: int = 4
+    job_workers: int = 4
+    job_queue_depth: int = 1000
+    job_stale_after_seconds: float = 900.0
+    near_duplicate_enabled: bool = False
+    near_duplicate_threshold: float = 0.8
+    near_duplicate_shingle_size: int = 1
+    survey_cache_max_entries: int = 1024
+    survey_cache_max_bytes: int = 16 * 1024 * 1024
+    survey_cache_ttl_seconds: float | None = None
+    survey_http_max_age: int = 31536000
+    compression_minimum_size: int = 500
+    write_behind_enabled: bool = False
+    write_behind_max_pending: int = 10000
+    write_behind_batch_size: int = 200
+    write_behind_flush_interval: float = 0.05
+    access_flush_interval: float = 30.0
+    access_max_pending: int = 100000
+    survey_retention_ttl_seconds: float | None = None
+    survey_retention_max_rows: int | None = None
+    survey_retention_batch_size: int = 500
+    state_backend: str = "memory"  # memory|mmap|redis
+    state_key_prefix: str = "survey-gen:"
+    state_mmap_path: str = "/dev/shm/survey-gen.state"
+    state_mmap_slots: int = 4096
+    state_mmap_value_size: int = 16384
+    state_redis_url: str = "redis://localhost:6379/0"
+    state_cache_ttl_seconds: float = 86400.0
+    env_file_watch_interval: float = 0.0  # seconds; 0 disables the .env watcher
+
+
+logger = structlog.get_logger(__name__)
+
+SettingsCallback = Callable[[Settings], None]
+
+_settings: Settings | None = None
+# Keyed by qualified name so re-importing a module replaces its callback.
+_subscribers: Dict[str, SettingsCallback] = {}
 
 
 def get_settings() -> Settings:
-    return Settings()
+    """Return the current settings snapshot; ``.env`` is read only on reload."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """Re-read the environment and ``.env`` and notify subscribers.
+
+    Invalid configuration raises and leaves the current snapshot in place.
+    """
+    global _settings
+    _settings = Settings()
+    for callback in list(_subscribers.values()):
+        callback(_settings)
+    return _settings
+
+
+def subscribe(callback: SettingsCallback) -> SettingsCallback:
+    """Call ``callback`` with the new snapshot after every reload."""
+    _subscribers[f"{callback.__module__}.{callback.__qualname__}"] = callback
+    return callback
+
+
+def _reload_from_signal() -> None:
+    try:
+        reload_settings()
+    except Exception:
+        logger.exception("settings_reload_failed")
+    else:
+        logger.info("settings_reloaded")
+
+
+def install_reload_signal() -> bool:
+    """Reload settings on SIGHUP (where the platform and loop support it)."""
+    if not hasattr(signal, "SIGHUP"):
+        return False
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, _reload_from_signal
+        )
+    except (NotImplementedError, RuntimeError):
+        return False
+    return True
+
+
+def remove_reload_signal() -> None:
+    if hasattr(signal, "SIGHUP"):
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+
+def _mtime(path: str) -> float | None:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+async def watch_settings_file(path: str = ".env", interval: float = 5.0) -> None:
+    """Reload settings whenever ``path`` changes, polling its mtime."""
+    last = _mtime(path)
+    while True:
+        await asyncio.sleep(interval)
+        current = _mtime(path)
+        if current != last:
+            last = current
+            _reload_from_signal()
@@ -1,17 +1,82 @@
 from __future__ import annotations
 
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 
-from .config import get_settings
+from .config import Settings, get_settings
+
+
+def engine_options(url: str, settings: Settings) -> dict:
+    """Pool options for ``create_async_engine`` derived from settings.
+
+    SQLite uses its own single-connection pools, so only the statement cache
+    size applies there.
+    """
+    options: dict = {"query_cache_size": settings.db_statement_cache_size}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
 
 settings = get_settings()
-engine = create_async_engine(settings.database_url, future=True)
+engine = create_async_engine(
+    settings.database_url,
+    future=True,
+    **engine_options(settings.database_url, settings),
+)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
+# Optional read replica for lookups that tolerate replication lag.
+read_engine = (
+    create_async_engine(
+        settings.database_read_replica_url,
+        future=True,
+        **engine_options(settings.database_read_replica_url, settings),
+    )
+    if settings.database_read_replica_url
+    else None
+)
+ReadSessionLocal = (
+    async_sessionmaker(read_engine, expire_on_commit=False) if read_engine else None
+)
+
 Base = declarative_base()
 
 
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session(
+    session: AsyncSession = Depends(get_session),
+) -> AsyncSession:
+    """Session for read-only lookups: the replica if configured, else the primary."""
+    if ReadSessionLocal is None:
+        yield session
+        return
+    async with ReadSessionLocal() as read_session:
+        yield read_session
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Factory for sessions that must outlive the dependency scope.
+
+    Streaming responses send their body after yield dependencies have exited,
+    so they open (and close) their own session from this factory instead.
+    """
+    return AsyncSessionLocal
+
+
+def get_read_session_factory(
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+) -> async_sessionmaker[AsyncSession]:
+    """Like ``get_session_factory``, but for the read replica if configured."""
+    return ReadSessionLocal or session_factory
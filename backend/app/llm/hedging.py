@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Sequence
+
+from ..utils.metrics import LLM_HEDGES
+from .providers import LLMProvider, stream_survey_events
+
+
+class BackendStats:
+    """Recent latencies and outcomes of one backend (sliding window)."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.successes = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def record_success(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        self.outcomes.append(True)
+        self.successes += 1
+
+    def record_error(self) -> None:
+        self.outcomes.append(False)
+        self.errors += 1
+
+    def record_cancelled(self, seconds: float) -> None:
+        # The call lost to a hedge: it took at least ``seconds``, so keep that
+        # as a lower-bound sample instead of only remembering fast wins.
+        self.latencies.append(seconds)
+        self.cancelled += 1
+
+    def percentile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class HedgedProvider:
+    """Composite provider that hedges slow calls across several backends.
+
+    The primary backend is picked at random, weighted towards backends with a
+    lower median latency and error rate. If it has not answered within its
+    ``percentile`` latency (or ``default_delay`` until it has samples), the
+    next backend is called too and the first valid survey wins; the other call
+    is cancelled. A backend that fails hands over to the next one immediately.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[LLMProvider],
+        percentile: float = 0.95,
+        default_delay: float = 2.0,
+        min_delay: float = 0.25,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.providers = list(providers)
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.stats = {id(p): BackendStats() for p in self.providers}
+        self._rng = rng or random.Random()
+
+    @property
+    def model_name(self) -> str:
+        # Label for calls that fail; successful calls report the backend that
+        # answered (see ``generate_with_model``).
+        return self.providers[0].model_name
+
+    def stats_for(self, provider: LLMProvider) -> BackendStats:
+        return self.stats[id(provider)]
+
+    def ordered(self) -> list[LLMProvider]:
+        """Backends in call order: weighted-random primary, then by score."""
+        scores = [self._score(p) for p in self.providers]
+        weights = [1 / s for s in scores]
+        primary = self._rng.choices(range(len(self.providers)), weights)[0]
+        rest = sorted(
+            (i for i in range(len(self.providers)) if i != primary),
+            key=scores.__getitem__,
+        )
+        return [self.providers[i] for i in [primary, *rest]]
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        latency = self.stats_for(provider).percentile(self.percentile)
+        if latency is None:
+            return self.default_delay
+        return max(self.min_delay, latency)
+
+    async def generate(self, description: str) -> dict:
+        return (await self.generate_with_model(description))[0]
+
+    async def generate_with_model(self, description: str) -> tuple[dict, str]:
+        """Return the first valid survey and the model of the backend that won."""
+        backends = self.ordered()
+        first = backends.pop(0)
+        tasks = {asyncio.create_task(self._call(first, description)): first}
+        delay: float | None = self.hedge_delay(first)
+        error: BaseException | None = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=delay if backends else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    hedge = backends.pop(0)
+                    tasks[asyncio.create_task(self._call(hedge, description))] = hedge
+                    LLM_HEDGES.inc(outcome="sent")
+                    delay = self.hedge_delay(hedge)
+                    continue
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        if provider is not first:
+                            LLM_HEDGES.inc(outcome="won")
+                        return task.result(), provider.model_name
+                    error = task.exception()
+                if backends and not tasks:
+                    failover = backends.pop(0)
+                    tasks[asyncio.create_task(self._call(failover, description))] = (
+                        failover
+                    )
+                    delay = self.hedge_delay(failover)
+        finally:
+            for task in tasks:
+                task.cancel()
+        # Every backend failed; surface the last error.
+        raise error
+
+    async def stream(self, description: str) -> AsyncIterator[dict]:
+        """Stream from the preferred backend; partial output cannot be hedged.
+
+        The final ``survey`` event carries the backend's ``model_name``.
+        """
+        provider = self.ordered()[0]
+        start = time.perf_counter()
+        try:
+            async for event in stream_survey_events(provider, description):
+                if event["type"] == "survey":
+                    self.stats_for(provider).record_success(time.perf_counter() - start)
+                    event = {**event, "model_name": provider.model_name}
+                yield event
+        except Exception:
+            self.stats_for(provider).record_error()
+            raise
+
+    async def aclose(self) -> None:
+        for provider in self.providers:
+            aclose = getattr(provider, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _score(self, provider: LLMProvider) -> float:
+        stats = self.stats_for(provider)
+        median = stats.percentile(0.5)
+        if median is None:
+            median = self.default_delay
+        return max(median, 1e-3) / max(1 - stats.error_rate(), 0.05)
+
+    async def _call(self, provider: LLMProvider, description: str) -> dict:
+        start = time.perf_counter()
+        try:
+            survey = await provider.generate(description)
+        except asyncio.CancelledError:
+            self.stats_for(provider).record_cancelled(time.perf_counter() - start)
+            raise
+        except Exception:
+            self.stats_for(provider).record_error()
+            raise
+        self.stats_for(provider).record_success(time.perf_counter() - start)
+        return survey
@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import json
+import random
 import uuid
 from datetime import datetime
-from typing import Protocol
+from typing import AsyncIterator, Protocol
 
 import httpx
+import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..config import Settings, get_settings
-from ..schemas import Survey as SurveySchema
+from ..schemas import Question as QuestionSchema
+from ..schemas import validate_survey
 from ..utils.hashing import normalize_description
+from ..utils.metrics import LLM_RETRIES, stage
+from ..utils.resilience import Bulkhead, CircuitBreaker
 from .prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+from .streaming import IncrementalSurveyParser
+
+logger = structlog.get_logger(__name__)
 
 
 class LLMProvider(Protocol):
@@ -20,10 +30,77 @@ class LLMProvider(Protocol):
     async def generate(self, description: str) -> dict: ...
 
 
+async def stream_survey_events(
+    provider: LLMProvider, description: str
+) -> AsyncIterator[dict]:
+    """Yield ``title`` and ``question`` events, then the full ``survey``.
+
+    Providers may implement ``stream(description)`` to emit events as the
+    completion arrives; otherwise the events are derived from ``generate``.
+    """
+    stream = getattr(provider, "stream", None)
+    if stream is not None:
+        async for event in stream(description):
+            yield event
+        return
+
+    survey = await provider.generate(description)
+    yield {"type": "title", "title": survey["title"]}
+    for index, question in enumerate(survey["questions"]):
+        yield {"type": "question", "index": index, "question": question}
+    yield {"type": "survey", "survey": survey}
+
+
+async def generate_survey(provider: LLMProvider, description: str) -> tuple[dict, str]:
+    """Return ``(survey, model_name)`` for one generation.
+
+    Composite providers answer from a different backend per call and implement
+    ``generate_with_model``; for the others the model is ``provider.model_name``.
+    """
+    generate_with_model = getattr(provider, "generate_with_model", None)
+    if generate_with_model is not None:
+        return await generate_with_model(description)
+    return await provider.generate(description), provider.model_name
+
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Create a pooled keep-alive client configured from settings.
+
+    HTTP/2 is only enabled when requested and the ``h2`` package (installed
+    with ``httpx[http2]``) is available; otherwise the client falls back to
+    HTTP/1.1 and logs a warning.
+    """
+    http2 = settings.llm_http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("llm_http2_unavailable", reason="h2 is not installed")
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.llm_connect_timeout,
+            read=settings.llm_read_timeout,
+            write=settings.llm_write_timeout,
+            pool=settings.llm_pool_timeout,
+        ),
+    )
+
+
 class MockProvider:
     model_name = "mock-v1"
 
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0) -> None:
+        # Simulated call duration in seconds: latency plus up to jitter extra.
+        self.latency = latency
+        self.jitter = jitter
+
     async def generate(self, description: str) -> dict:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
         norm = normalize_description(description)
         base_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, norm)
 
@@ -66,36 +143,102 @@ class MockProvider:
 
 class OpenAIProvider:
     model_name = "gpt-4o-mini"
+    url = "https://api.openai.com/v1/chat/completions"
 
-    def __init__(self, api_key: str) -> None:
+    def __init__(self, api_key: str, client: httpx.AsyncClient | None = None) -> None:
         self.api_key = api_key
+        # Shared across calls and retries so connections are kept alive.
+        self.client = client or httpx.AsyncClient(timeout=15)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _request_body(self, description: str, stream: bool = False) -> dict:
+        prompt = USER_PROMPT_TEMPLATE.format(description=description)
+        body = {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.2,
+        }
+        if stream:
+            body["stream"] = True
+        return body
 
     @retry(
-        wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3)
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        stop=stop_after_attempt(3),
+        before_sleep=lambda state: LLM_RETRIES.inc(provider=state.args[0].model_name),
     )
     async def generate(self, description: str) -> dict:
-        prompt = USER_PROMPT_TEMPLATE.format(description=description)
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.post(
-                "https://api.openai.com/v1/chat/completions",
+        with stage("llm_http"):
+            resp = await self.client.post(
+                self.url,
                 headers={"Authorization": f"Bearer {self.api_key}"},
-                json={
-                    "model": self.model_name,
-                    "messages": [
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.2,
-                },
+                json=self._request_body(description),
             )
             resp.raise_for_status()
             content = resp.json()["choices"][0]["message"]["content"]
 
-        raw = json.loads(content)
-        normalized = _normalize_survey_dict(raw, description)
+        with stage("normalize"):
+            raw = json.loads(content)
+            normalized = _normalize_survey_dict(raw, description)
         # Validate and prune extras; return JSON-serializable dict
-        model = SurveySchema.model_validate(normalized)
-        return model.model_dump(mode="json")
+        with stage("validate"):
+            return validate_survey(normalized)
+
+    async def stream(self, description: str) -> AsyncIterator[dict]:
+        """Stream a completion, emitting each question once it is complete.
+
+        Not retried: events may already have been delivered when a failure
+        occurs, so errors propagate to the caller.
+        """
+        parser = IncrementalSurveyParser()
+        fields: dict = {}
+        questions: list[dict] = []
+        async with self.client.stream(
+            "POST",
+            self.url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json=self._request_body(description, stream=True),
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if not delta:
+                    continue
+                for event in parser.feed(delta):
+                    if event.kind == "field":
+                        fields[event.key] = event.value
+                        if event.key == "title" and event.value:
+                            yield {"type": "title", "title": str(event.value)}
+                        continue
+                    if not isinstance(event.value, dict):
+                        continue
+                    base_uuid = _base_uuid(fields, description)
+                    question = QuestionSchema.model_validate(
+                        _normalize_question(event.value, len(questions) + 1, base_uuid)
+                    ).model_dump(mode="json")
+                    questions.append(question)
+                    yield {
+                        "type": "question",
+                        "index": len(questions) - 1,
+                        "question": question,
+                    }
+
+        normalized = _normalize_survey_dict(
+            {**fields, "questions": questions}, description
+        )
+        survey = validate_survey(normalized)
+        yield {"type": "survey", "survey": survey}
 
 
 def _normalize_survey_dict(data: dict, description: str) -> dict:
@@ -114,10 +257,7 @@ def _normalize_survey_dict(data: dict, description: str) -> dict:
     )
 
     # Base UUID for deterministic question IDs
-    try:
-        base_uuid = uuid.UUID(out["id"])  # use the survey id as the namespace
-    except Exception:
-        base_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, normalize_description(description))
+    base_uuid = _base_uuid(out, description)
 
     # Questions
     questions = data.get("questions") or []
@@ -125,71 +265,83 @@ def _normalize_survey_dict(data: dict, description: str) -> dict:
     for idx, q in enumerate(questions, start=1):
         if not isinstance(q, dict):
             continue
-        qq: dict = {}
-
-        # id (deterministic when missing): derive from survey base UUID + index
-        qq["id"] = _safe_uuid_str(q.get("id")) or str(uuid.uuid5(base_uuid, f"q{idx}"))
-
-        # type normalization
-        qtype = (q.get("type") or "open_text").lower().replace("-", "_")
-        alias_map = {
-            "yesno": "yes_no",
-            "yes_no": "yes_no",
-            "multiple_choice": "multiple_choice",
-            "multiplechoice": "multiple_choice",
-            "checkbox": "checkboxes",
-            "checkboxes": "checkboxes",
-            "rating": "rating",
-            "likert": "likert",
-            "open_text": "open_text",
-            "open": "open_text",
-            "text": "open_text",
-            "matrix": "matrix",
-        }
-        qtype = alias_map.get(qtype, "open_text")
-        qq["type"] = qtype
-
-        # text / question alias
-        text = q.get("text") or q.get("question") or ""
-        qq["text"] = str(text)
-
-        # required default True
-        req = q.get("required")
-        qq["required"] = bool(True if req is None else req)
-
-        # options (only keep list of strings if present)
-        opts = q.get("options")
-        if isinstance(opts, list):
-            qq["options"] = [str(o) for o in opts]
-
-        # scale: accept object or int like 5
-        scale = q.get("scale")
-        if isinstance(scale, int):
-            qq["scale"] = {
-                "min": 1,
-                "max": int(scale),
-                "labels": [str(i) for i in range(1, int(scale) + 1)],
-            }
-        elif isinstance(scale, dict):
-            mn = int(scale.get("min", 1))
-            mx = int(scale.get("max", 5))
-            labels = scale.get("labels")
-            if not isinstance(labels, list):
-                labels = None
-            qq["scale"] = {"min": mn, "max": mx, "labels": labels}
-        elif qtype in {"rating", "likert"}:
-            qq["scale"] = {
-                "min": 1,
-                "max": 5,
-                "labels": ["1", "2", "3", "4", "5"],
-            }
-
-        norm_questions.append(qq)
+        norm_questions.append(_normalize_question(q, idx, base_uuid))
 
     out["questions"] = norm_questions
     return out
 
 
+def _base_uuid(data: dict, description: str) -> uuid.UUID:
+    """Namespace for question ids: the survey id, else one derived from the brief."""
+    try:
+        return uuid.UUID(str(data.get("id")))  # use the survey id as the namespace
+    except Exception:
+        return uuid.uuid5(uuid.NAMESPACE_DNS, normalize_description(description))
+
+
+def _normalize_question(q: dict, idx: int, base_uuid: uuid.UUID) -> dict:
+    """Coerce one question object into our schema (``idx`` is 1-based)."""
+    qq: dict = {}
+
+    # id (deterministic when missing): derive from survey base UUID + index
+    qq["id"] = _safe_uuid_str(q.get("id")) or str(uuid.uuid5(base_uuid, f"q{idx}"))
+
+    # type normalization
+    qtype = (q.get("type") or "open_text").lower().replace("-", "_")
+    alias_map = {
+        "yesno": "yes_no",
+        "yes_no": "yes_no",
+        "multiple_choice": "multiple_choice",
+        "multiplechoice": "multiple_choice",
+        "checkbox": "checkboxes",
+        "checkboxes": "checkboxes",
+        "rating": "rating",
+        "likert": "likert",
+        "open_text": "open_text",
+        "open": "open_text",
+        "text": "open_text",
+        "matrix": "matrix",
+    }
+    qtype = alias_map.get(qtype, "open_text")
+    qq["type"] = qtype
+
+    # text / question alias
+    text = q.get("text") or q.get("question") or ""
+    qq["text"] = str(text)
+
+    # required default True
+    req = q.get("required")
+    qq["required"] = bool(True if req is None else req)
+
+    # options (only keep list of strings if present)
+    opts = q.get("options")
+    if isinstance(opts, list):
+        qq["options"] = [str(o) for o in opts]
+
+    # scale: accept object or int like 5
+    scale = q.get("scale")
+    if isinstance(scale, int):
+        qq["scale"] = {
+            "min": 1,
+            "max": int(scale),
+            "labels": [str(i) for i in range(1, int(scale) + 1)],
+        }
+    elif isinstance(scale, dict):
+        mn = int(scale.get("min", 1))
+        mx = int(scale.get("max", 5))
+        labels = scale.get("labels")
+        if not isinstance(labels, list):
+            labels = None
+        qq["scale"] = {"min": mn, "max": mx, "labels": labels}
+    elif qtype in {"rating", "likert"}:
+        qq["scale"] = {
+            "min": 1,
+            "max": 5,
+            "labels": ["1", "2", "3", "4", "5"],
+        }
+    return qq
+
+
 def _safe_uuid_str(value: object | None) -> str | None:
     """Return a valid UUID string or None if parsing fails."""
     if not value:
@@ -200,33 +352,137 @@ def _safe_uuid_str(value: object | None) -> str | None:
         return None
 
 
-class NotImplementedProvider(MockProvider):
-    """Fallback provider for unimplemented integrations."""
+class GuardedProvider:
+    """Run a provider behind a bulkhead and a circuit breaker.
+
+    Calls fail fast with ``ProviderUnavailable`` when the circuit is open, the
+    wait queue is full, or no slot frees up before the queue deadline. Other
+    attributes (``model_name``, ``client``, ``aclose``) pass through.
+    """
+
+    def __init__(
+        self, provider: LLMProvider, bulkhead: Bulkhead, breaker: CircuitBreaker
+    ) -> None:
+        self.provider = provider
+        self.bulkhead = bulkhead
+        self.breaker = breaker
+
+    def __getattr__(self, name: str):
+        return getattr(self.provider, name)
+
+    async def generate(self, description: str) -> dict:
+        with self.breaker.guard():
+            async with self.bulkhead.slot():
+                return await self.provider.generate(description)
+
+    async def generate_with_model(self, description: str) -> tuple[dict, str]:
+        with self.breaker.guard():
+            async with self.bulkhead.slot():
+                return await generate_survey(self.provider, description)
+
+    async def stream(self, description: str) -> AsyncIterator[dict]:
+        with self.breaker.guard():
+            async with self.bulkhead.slot():
+                async for event in stream_survey_events(self.provider, description):
+                    yield event
+
+
+class OpenRouterProvider(OpenAIProvider):
+    model_name = "openai/gpt-4o-mini"
+    url = "https://openrouter.ai/api/v1/chat/completions"
+
+
+class TogetherProvider(OpenAIProvider):
+    model_name = "meta-llama/Llama-3.3-70B-Instruct-Turbo"
+    url = "https://api.together.xyz/v1/chat/completions"
 
 
 PROVIDER_MAP = {
     "openai": OpenAIProvider,
-    "openrouter": NotImplementedProvider,
-    "together": NotImplementedProvider,
+    "openrouter": OpenRouterProvider,
+    "together": TogetherProvider,
     "mock": MockProvider,
 }
 
 
+# Long-lived provider instances (and their HTTP clients), keyed by provider name.
+_providers: dict[str, LLMProvider] = {}
+
+
 def get_llm_provider(settings: Settings | None = None) -> LLMProvider:
+    """Return the shared provider instance for the configured backend."""
     settings = settings or get_settings()
     provider_name = (settings.llm_provider or "mock").lower()
-    provider_cls = PROVIDER_MAP.get(provider_name, MockProvider)
-
-    # Handle OpenAI explicitly: require API key; otherwise fall back to mock
-    if provider_cls is OpenAIProvider:
-        if settings.openai_api_key:
-            return OpenAIProvider(settings.openai_api_key)
-        # Missing API key: use mock to avoid runtime TypeError
-        return MockProvider()
-
-    # For not-yet-implemented providers use mock
-    if provider_cls is NotImplementedProvider:
-        return MockProvider()
+    provider = _providers.get(provider_name)
+    if provider is None:
+        provider = _providers[provider_name] = GuardedProvider(
+            _build_provider(provider_name, settings),
+            Bulkhead(
+                settings.llm_max_concurrency,
+                settings.llm_max_queue,
+                settings.llm_queue_timeout,
+            ),
+            CircuitBreaker(
+                settings.llm_breaker_failure_threshold, settings.llm_breaker_cooldown
+            ),
+        )
+    return provider
+
+
+async def close_llm_providers() -> None:
+    """Close pooled HTTP clients held by shared providers."""
+    providers = list(_providers.values())
+    _providers.clear()
+    for provider in providers:
+        aclose = getattr(provider, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _build_provider(provider_name: str, settings: Settings) -> LLMProvider:
+    if provider_name == "hedged":
+        from .hedging import HedgedProvider
+
+        # Only hedge across backends that can really answer: a mock standing in
+        # for a backend without credentials would win nearly every race and
+        # store fake surveys under real hashes.
+        backends = [
+            _build_provider(name, settings)
+            for name in (n.lower() for n in settings.llm_hedge_providers)
+            if name != "hedged" and _is_configured(name, settings)
+        ]
+        if len(backends) < 2:
+            return backends[0] if backends else _mock_provider(settings)
+        return HedgedProvider(
+            backends,
+            percentile=settings.llm_hedge_percentile,
+            default_delay=settings.llm_hedge_delay,
+            min_delay=settings.llm_hedge_min_delay,
+        )
 
-    # Default: return the concrete provider (mock)
-    return provider_cls()
+    provider_cls = PROVIDER_MAP.get(provider_name, MockProvider)
+    # OpenAI-compatible backends need an API key; without one fall back to mock
+    # rather than failing every request.
+    if issubclass(provider_cls, OpenAIProvider):
+        api_key = getattr(settings, f"{provider_name}_api_key", None)
+        if api_key:
+            return provider_cls(api_key, client=build_http_client(settings))
+    return _mock_provider(settings)
+
+
+def _is_configured(provider_name: str, settings: Settings) -> bool:
+    """Whether ``provider_name`` builds a real backend rather than the mock fallback."""
+    provider_cls = PROVIDER_MAP.get(provider_name)
+    if provider_cls is MockProvider:
+        return True
+    if provider_cls is not None and issubclass(provider_cls, OpenAIProvider):
+        if getattr(settings, f"{provider_name}_api_key", None):
+            return True
+    logger.warning("hedge_backend_skipped", provider=provider_name)
+    return False
+
+
+def _mock_provider(settings: Settings) -> MockProvider:
+    return MockProvider(
+        latency=settings.mock_latency_ms / 1000, jitter=settings.mock_jitter_ms / 1000
+    )
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+from typing import Any, List, NamedTuple
+
+
+class ParsedEvent(NamedTuple):
+    kind: str  # "field" for a top-level key, "question" for a questions[] item
+    key: str | None
+    value: Any
+
+
+class IncrementalSurveyParser:
+    """Incrementally parse a streamed survey JSON object.
+
+    Text is fed in arbitrary chunks (e.g. LLM token deltas). Each top-level
+    field is reported as soon as its value is complete, and every object in the
+    top-level ``questions`` array is reported as soon as its closing brace
+    arrives, without waiting for the rest of the document. Anything before the
+    first ``{`` (such as a markdown fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buf: List[str] = []
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: str | None = None
+        self._value_start: int | None = None
+        self._item_start: int | None = None
+        self.done = False
+
+    def feed(self, chunk: str) -> list[ParsedEvent]:
+        self._buf.extend(chunk)
+        events: list[ParsedEvent] = []
+        buf = self._buf
+        while self._pos < len(buf) and not self.done:
+            i = self._pos
+            ch = buf[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(i, events)
+                continue
+
+            if not self._stack:
+                if ch == "{":
+                    self._open(ch, i)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                if len(self._stack) == 1 and not self._expect_key:
+                    self._value_start = i
+            elif ch in "{[":
+                if len(self._stack) == 1 and self._value_start is None:
+                    self._value_start = i
+                self._open(ch, i)
+            elif ch in "}]":
+                self._close(i, events)
+            elif len(self._stack) == 1:
+                if ch == ":":
+                    self._value_start = None
+                elif ch == ",":
+                    self._end_scalar(i, events)
+                    self._expect_key = True
+                elif not ch.isspace() and self._value_start is None:
+                    self._value_start = i
+        return events
+
+    def _text(self, start: int, end: int) -> str:
+        return "".join(self._buf[start:end])
+
+    def _open(self, ch: str, i: int) -> None:
+        self._stack.append(ch)
+        if len(self._stack) == 1:
+            self._expect_key = True
+        elif (
+            ch == "{"
+            and len(self._stack) == 3
+            and self._stack[1] == "["
+            and self._key == "questions"
+        ):
+            self._item_start = i
+
+    def _close(self, i: int, events: list[ParsedEvent]) -> None:
+        depth = len(self._stack)
+        if depth == 1:
+            self._end_scalar(i, events)
+            self._stack.pop()
+            self.done = True
+            return
+        self._stack.pop()
+        if depth == 3 and self._item_start is not None:
+            item = self._loads(self._item_start, i + 1)
+            self._item_start = None
+            if item is not None:
+                events.append(ParsedEvent("question", self._key, item))
+        elif depth == 2 and self._value_start is not None:
+            if self._key != "questions":
+                value = self._loads(self._value_start, i + 1)
+                events.append(ParsedEvent("field", self._key, value))
+            self._value_start = None
+
+    def _end_string(self, i: int, events: list[ParsedEvent]) -> None:
+        if len(self._stack) != 1:
+            return
+        text = self._loads(self._string_start, i + 1)
+        if self._expect_key:
+            self._key = text
+            self._expect_key = False
+        else:
+            events.append(ParsedEvent("field", self._key, text))
+            self._value_start = None
+
+    def _end_scalar(self, i: int, events: list[ParsedEvent]) -> None:
+        if self._value_start is None:
+            return
+        raw = self._text(self._value_start, i).strip()
+        self._value_start = None
+        if raw:
+            events.append(ParsedEvent("field", self._key, self._loads_text(raw)))
+
+    def _loads(self, start: int, end: int) -> Any:
+        return self._loads_text(self._text(start, end))
+
+    @staticmethod
+    def _loads_text(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
@@ -1,22 +1,74 @@
 from __future__ import annotations
 
+import asyncio
+import math
+import time
 import uuid
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from .config import get_settings
+from .config import (
+    get_settings,
+    install_reload_signal,
+    remove_reload_signal,
+    watch_settings_file,
+)
+from .db import AsyncSessionLocal
+from .llm.providers import close_llm_providers, get_llm_provider
 from .logging import setup_logging
-from .routers import health, surveys
+from .routers import admin, health, surveys
+from .services.access import access_tracker
+from .services.jobs import job_queue
+from .services.survey_service import load_near_duplicate_index, write_behind
+from .utils.cache import survey_cache
+from .utils.compression import CompressionMiddleware
+from .utils.metrics import (
+    HTTP_REQUEST_SECONDS,
+    server_timing_header,
+    start_request_timings,
+)
+from .utils.near_duplicate import near_duplicate_index
+from .utils.rate_limit import rate_limiter
+from .utils.resilience import ProviderUnavailable
+from .utils.state import close_state_backend
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
     setup_logging()
 
-    app = FastAPI(title="Survey Generator API")
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Build the shared provider (and its connection pool) up front.
+        provider = get_llm_provider(settings)
+        rate_limiter.start_sweeper()
+        install_reload_signal()
+        watcher = None
+        if settings.env_file_watch_interval > 0:
+            watcher = asyncio.create_task(
+                watch_settings_file(".env", settings.env_file_watch_interval)
+            )
+        await job_queue.recover(provider)
+        if near_duplicate_index.enabled:
+            async with AsyncSessionLocal() as session:
+                await load_near_duplicate_index(session)
+        yield
+        if watcher is not None:
+            watcher.cancel()
+        remove_reload_signal()
+        await rate_limiter.stop_sweeper()
+        await job_queue.stop()
+        await write_behind.drain()
+        await access_tracker.stop()
+        await close_llm_providers()
+        await survey_cache.flush()
+        await close_state_backend()
+
+    app = FastAPI(title="Survey Generator API", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -25,6 +77,9 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=settings.compression_minimum_size
+    )
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(
@@ -32,6 +87,31 @@ def create_app() -> FastAPI:
     ):
         return JSONResponse(status_code=400, content={"detail": exc.errors()})
 
+    @app.exception_handler(ProviderUnavailable)
+    async def provider_unavailable_handler(request: Request, exc: ProviderUnavailable):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": exc.detail},
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
+
+    @app.middleware("http")
+    async def record_timings(request: Request, call_next):
+        timings = start_request_timings()
+        start = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            elapsed,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(response.status_code),
+        )
+        timings.append(("total", elapsed))
+        response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
     @app.middleware("http")
     async def add_request_id(request: Request, call_next):
         request_id = str(uuid.uuid4())
@@ -41,6 +121,7 @@ def create_app() -> FastAPI:
 
     app.include_router(health.router)
     app.include_router(surveys.router)
+    app.include_router(admin.router)
     return app
 
 
@@ -3,11 +3,11 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, LargeBinary, String, Text, func, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.types import JSON
+from sqlalchemy.types import JSON, TypeDecorator
 
 from .config import get_settings
 from .db import Base
@@ -15,23 +15,136 @@ from .db import Base
 settings = get_settings()
 
 USE_POSTGRES = settings.database_url.startswith("postgres")
-UUID_TYPE = PGUUID(as_uuid=True) if USE_POSTGRES else String(36)
-UUID_DEFAULT = uuid.uuid4 if USE_POSTGRES else lambda: str(uuid.uuid4())
+
+
+class BinaryUUID(TypeDecorator):
+    """UUID stored as 16 raw bytes on backends without a native UUID type."""
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value.bytes
+
+    def process_result_value(self, value, dialect):
+        return uuid.UUID(bytes=bytes(value)) if value is not None else None
+
+
+class HashBytes(TypeDecorator):
+    """SHA-256 digest stored as 32 raw bytes, exposed as its 64-char hex string."""
+
+    impl = LargeBinary(32)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return bytes.fromhex(value)
+
+    def process_result_value(self, value, dialect):
+        return bytes(value).hex() if value is not None else None
+
+
+UUID_TYPE = PGUUID(as_uuid=True) if USE_POSTGRES else BinaryUUID()
+UUID_DEFAULT = uuid.uuid4
 SURVEY_JSON = JSONB if USE_POSTGRES else JSON
 
 
+def uuid_key(value: uuid.UUID | str) -> uuid.UUID:
+    """Convert a UUID (or its string form) to the type bound for UUID_TYPE."""
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(value)
+
+
+def _survey_indexes() -> tuple:
+    """Indexes backing the keyset-paginated listing (see migration 0004)."""
+    indexes: tuple = (
+        Index("ix_surveys_created_at_id", "created_at", "id"),
+        Index("ix_surveys_model_name_created_at_id", "model_name", "created_at", "id"),
+    )
+    if USE_POSTGRES:
+        indexes += (
+            Index(
+                "ix_surveys_survey_json_gin",
+                "survey_json",
+                postgresql_using="gin",
+                postgresql_ops={"survey_json": "jsonb_path_ops"},
+            ),
+        )
+    return indexes
+
+
 class Survey(Base):
     __tablename__ = "surveys"
+    __table_args__ = _survey_indexes()
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID_TYPE, primary_key=True, default=UUID_DEFAULT
     )
     description: Mapped[str] = mapped_column(Text, nullable=False)
     description_hash: Mapped[str] = mapped_column(
-        String(64), nullable=False, unique=True, index=True
+        HashBytes(), nullable=False, unique=True, index=True
     )
     model_name: Mapped[str] = mapped_column(String(50), nullable=False)
     survey_json: Mapped[dict] = mapped_column(SURVEY_JSON, nullable=False)
+    # Schema version survey_json was validated against when written; 0 means
+    # a legacy row that still needs normalizing.
+    schema_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+    # Last time the survey was served, written in batches by the access
+    # tracker; NULL for rows not read since migration 0005 (use created_at).
+    last_accessed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=True
+    )
+
+
+# Retention orders and filters rows by this expression (see migration 0005).
+SURVEY_LAST_USED = func.coalesce(Survey.last_accessed_at, Survey.created_at)
+Index("ix_surveys_last_used", SURVEY_LAST_USED)
+
+
+JOB_PENDING = "status IN ('queued', 'running')"
+
+
+class SurveyJob(Base):
+    """An asynchronous generation request; see ``app.services.jobs``."""
+
+    __tablename__ = "survey_jobs"
+    __table_args__ = (
+        # At most one pending job per brief (see migration 0007).
+        Index(
+            "uq_survey_jobs_pending_description_hash",
+            "description_hash",
+            unique=True,
+            postgresql_where=text(JOB_PENDING),
+            sqlite_where=text(JOB_PENDING),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID_TYPE, primary_key=True, default=UUID_DEFAULT
+    )
+    description: Mapped[str] = mapped_column(Text, nullable=False)
+    description_hash: Mapped[str] = mapped_column(
+        HashBytes(), nullable=False, index=True
+    )
+    # queued -> running -> succeeded | failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    survey_id: Mapped[uuid.UUID | None] = mapped_column(UUID_TYPE, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+
+from ..config import Settings, get_settings, reload_settings, subscribe
+
+
+def _expected_authorization(current: Settings) -> str | None:
+    return f"Bearer {current.admin_token}" if current.admin_token else None
+
+
+_authorization = _expected_authorization(get_settings())
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    global _authorization
+    _authorization = _expected_authorization(new)
+
+
+def verify_admin_token(request: Request) -> None:
+    """Admin endpoints only exist when ``ADMIN_TOKEN`` is set, and require it."""
+    if _authorization is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode(), _authorization.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(verify_admin_token)]
+)
+
+
+@router.post("/reload-settings")
+async def reload_settings_endpoint() -> dict:
+    """Re-read the environment and ``.env``; the previous settings stay on error.
+
+    Errors name the offending settings only; their values may be secrets.
+    """
+    try:
+        reload_settings()
+    except ValidationError as exc:
+        errors = [{"loc": err["loc"], "msg": err["msg"]} for err in exc.errors()]
+        raise HTTPException(status_code=422, detail=errors) from exc
+    return {"status": "reloaded"}
@@ -1,14 +1,84 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from ..db import engine, get_session, read_engine
+from ..services.access import access_tracker
+from ..services.jobs import job_queue
+from ..services.survey_service import survey_flights, write_behind
+from ..utils.cache import survey_cache
+from ..utils.metrics import REGISTRY
 
 router = APIRouter()
 
 
+def _pool_stats() -> dict:
+    stats = {}
+    engines = {"primary": engine, "replica": read_engine}
+    for label, eng in engines.items():
+        if eng is None:
+            continue
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(eng.pool, name, None)
+            if fn is not None:
+                stats[(label, name)] = fn()
+    return stats
+
+
+REGISTRY.gauge(
+    "db_pool_connections",
+    "Connection pool state of the primary and replica engines.",
+    ("engine", "state"),
+    collect=_pool_stats,
+)
+REGISTRY.gauge(
+    "survey_cache_entries",
+    "Entries and bytes held by the in-process survey cache.",
+    ("unit",),
+    collect=lambda: {
+        ("entries",): len(survey_cache),
+        ("bytes",): survey_cache.bytes,
+    },
+)
+REGISTRY.counter(
+    "survey_cache_events_total",
+    "In-process survey cache hits, misses, evictions and expirations.",
+    ("event",),
+    collect=lambda: {
+        (event,): survey_cache.stats()[event]
+        for event in ("hits", "misses", "evictions", "expirations")
+    },
+)
+REGISTRY.counter(
+    "survey_singleflight_total",
+    "Single-flight leaders, coalesced waiters, errors and leader handoffs.",
+    ("event",),
+    collect=lambda: {
+        (event,): survey_flights.stats()[event]
+        for event in ("leaders", "coalesced", "errors", "handoffs")
+    },
+)
+
+REGISTRY.gauge(
+    "survey_job_queue_depth",
+    "Generation jobs waiting for a worker in this process.",
+    collect=lambda: {(): job_queue.depth()},
+)
+REGISTRY.gauge(
+    "survey_write_behind_depth",
+    "Generated surveys waiting to be written by the write-behind flusher.",
+    collect=lambda: {(): write_behind.depth()},
+)
+REGISTRY.gauge(
+    "survey_access_pending",
+    "Surveys read since the last last_accessed_at flush.",
+    collect=lambda: {(): access_tracker.depth()},
+)
+
+
 @router.get("/healthz")
 async def healthz(session: AsyncSession = Depends(get_session)) -> dict:
     try:
@@ -16,3 +86,10 @@ async def healthz(session: AsyncSession = Depends(get_session)) -> dict:
     except Exception as exc:  # pragma: no cover - unexpected DB errors
         raise HTTPException(status_code=503, detail="database unavailable") from exc
     return {"status": "ok"}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
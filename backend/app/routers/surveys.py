@@ -1,15 +1,63 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncIterator
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
+import structlog
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..config import get_settings
-from ..db import get_session
+from ..config import Settings, get_settings, subscribe
+from ..db import (
+    get_read_session,
+    get_read_session_factory,
+    get_session,
+    get_session_factory,
+)
 from ..llm.providers import LLMProvider, get_llm_provider
 from ..models import Survey as SurveyModel
-from ..schemas import Survey, SurveyGenerateRequest
-from ..services.survey_service import generate_or_get_survey
-from ..utils.rate_limit import rate_limit_dep
+from ..models import SurveyJob, uuid_key
+from ..schemas import (
+    SURVEY_SCHEMA_VERSION,
+    QuestionType,
+    Survey,
+    SurveyBatchGenerateRequest,
+    SurveyBatchGenerateResponse,
+    SurveyBatchItem,
+    SurveyGenerateRequest,
+    SurveyJobStatus,
+    SurveyListResponse,
+)
+from ..services.access import access_tracker
+from ..services.export import iter_export_rows, iter_ndjson
+from ..services.jobs import JobQueueFull, job_queue
+from ..services.survey_service import (
+    InvalidCursor,
+    find_survey,
+    generate_or_get_survey,
+    generate_or_get_surveys,
+    get_surveys_by_hash,
+    list_surveys,
+    load_survey,
+    match_near_duplicate,
+    normalize_survey_payload,
+    store_generated_survey,
+    stream_provider,
+    survey_flights,
+    with_survey_id,
+)
+from ..utils.cache import survey_cache
+from ..utils.compression import etag_for_encoding, etag_without_encoding, negotiate
+from ..utils.idempotency import compute_hash
+from ..utils.metrics import CACHE_LOOKUPS, STREAM_FIRST_QUESTION_SECONDS, stage
+from ..utils.near_duplicate import near_duplicate_index
+from ..utils.rate_limit import client_key, rate_limit_dep, rate_limiter
+
+logger = structlog.get_logger(__name__)
 
 settings = get_settings()
 # Backwards-compat: some tests reset this variable after reload
@@ -22,77 +70,471 @@ def get_provider() -> LLMProvider:
     return get_llm_provider(settings)
 
 
+def _expected_authorization(current: Settings) -> str | None:
+    return f"Bearer {current.api_token}" if current.api_token else None
+
+
+_authorization = _expected_authorization(settings)
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    global settings, _authorization
+    settings = new
+    _authorization = _expected_authorization(new)
+
+
 def verify_token(request: Request) -> None:
-    current = get_settings()
-    if current.api_token:
-        auth = request.headers.get("Authorization")
-        if auth != f"Bearer {current.api_token}":
+    if _authorization is not None:
+        if request.headers.get("Authorization") != _authorization:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
 
-async def _ensure_valid_survey_json(survey: SurveyModel, session: AsyncSession) -> dict:
-    """Validate survey.survey_json against schema; normalize and persist if needed."""
-    # Proactively load attributes to avoid async lazy-load in property access
-    try:
-        await session.refresh(survey, attribute_names=["survey_json", "description"])
-    except Exception:
-        pass
+def _ensure_valid_survey_json(survey: SurveyModel) -> dict:
+    """Return survey.survey_json, validating only rows not checked at write time.
 
-    data = survey.survey_json
-    try:
-        model = Survey.model_validate(data)
-        # Return JSON-serializable dump to store in DB JSON field
-        return model.model_dump(mode="json")
-    except Exception:
-        # Normalize legacy or non-conforming payloads then validate and persist
-        from ..llm.providers import (  # local import to avoid cycles
-            _normalize_survey_dict,
-        )
+    Legacy rows are normalized in memory; ``python -m app.cli.backfill``
+    persists the normalized payloads so reads never write. Rows stored before
+    the row id was stamped into the payload get it stamped here, so the ``id``
+    clients see can always be fetched back.
+    """
+    with stage("payload"):
+        if survey.schema_version >= SURVEY_SCHEMA_VERSION:
+            data = survey.survey_json
+        else:
+            data = normalize_survey_payload(survey.survey_json, survey.description)
+        if data.get("id") != str(survey.id):
+            data = with_survey_id(data, survey.id)
+        return data
 
-        normalized = _normalize_survey_dict(
-            data if isinstance(data, dict) else {}, survey.description
-        )
-        model = Survey.model_validate(normalized)
-        fixed = model.model_dump(mode="json")
-        survey.survey_json = fixed
-        try:
-            await session.commit()
-            # Ensure the attribute is loaded if accessed later,
-            # but we return fixed directly
-            await session.refresh(survey, attribute_names=["survey_json"])
-        except Exception:
-            await session.rollback()
-        return fixed
+
+def _survey_response(
+    data: dict, status_code: int = status.HTTP_200_OK, headers: dict | None = None
+) -> ORJSONResponse:
+    """Serialize an already-validated payload, bypassing ``response_model``.
+
+    Payloads are validated once when written (or normalized on read), so
+    FastAPI's second validation and the stdlib encoder are skipped.
+    """
+    with stage("serialize"):
+        return ORJSONResponse(data, status_code=status_code, headers=headers)
 
 
 @router.post("/generate", response_model=Survey, status_code=status.HTTP_201_CREATED)
 async def generate_survey(
     payload: SurveyGenerateRequest,
-    response: Response,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
+    provider: LLMProvider = Depends(get_provider),
+    _: None = Depends(rate_limit_dep),
+    async_mode: bool = Query(False, alias="async"),
+) -> Response:
+    verify_token(request)
+    with stage("hash"):
+        normalized, description_hash = compute_hash(payload.description)
+    if async_mode:
+        return await _submit_job(
+            session, payload.description, description_hash, provider
+        )
+    entry = await survey_cache.fetch_entry_by_hash(description_hash)
+    CACHE_LOOKUPS.inc(layer="l1", result="miss" if entry is None else "hit")
+    if entry is not None:
+        access_tracker.touch(entry.survey_id)
+        return _survey_response(entry.payload, headers={"X-Cache-Hit": "1"})
+
+    survey = None
+    if near_duplicate_index.enabled:
+        # The index only knows this process's briefs: an exact row stored by
+        # another worker must win over a near match, so look it up first.
+        survey = await find_survey(read_session, description_hash)
+        if survey is None:
+            near = match_near_duplicate(normalized, description_hash)
+        else:
+            near = None
+        if near is not None:
+            response = await _near_duplicate_response(read_session, *near)
+            if response is not None:
+                return response
+
+    if survey is not None:
+        cache_hit = True
+    else:
+        survey, cache_hit = await generate_or_get_survey(
+            payload.description,
+            session,
+            provider,
+            read_session=read_session,
+            description_hash=description_hash,
+            normalized=normalized,
+            looked_up=near_duplicate_index.enabled,
+        )
+    data = _ensure_valid_survey_json(survey)
+    survey_cache.put(survey.id, survey.description_hash, data)
+    if cache_hit:
+        access_tracker.touch(survey.id)
+    return _survey_response(
+        data,
+        status_code=status.HTTP_200_OK if cache_hit else status.HTTP_201_CREATED,
+        headers={"X-Cache-Hit": "1" if cache_hit else "0"},
+    )
+
+
+async def _near_duplicate_response(
+    session: AsyncSession, near_hash: str, similarity: float
+) -> ORJSONResponse | None:
+    """Serve the stored near-duplicate of a brief, if it still exists."""
+    CACHE_LOOKUPS.inc(layer="near", result="hit")
+    entry = await survey_cache.fetch_entry_by_hash(near_hash)
+    if entry is None:
+        match = (await get_surveys_by_hash(session, [near_hash])).get(near_hash)
+        if match is None:
+            return None
+        data = _ensure_valid_survey_json(match)
+        entry = survey_cache.put(match.id, near_hash, data)
+    access_tracker.touch(entry.survey_id)
+    headers = {"X-Cache-Hit": "near", "X-Cache-Similarity": f"{similarity:.2f}"}
+    return _survey_response(entry.payload, headers=headers)
+
+
+async def _submit_job(
+    session: AsyncSession,
+    description: str,
+    description_hash: str,
+    provider: LLMProvider,
+) -> JSONResponse:
+    """Queue (or reuse) a generation job and answer 202 with its status."""
+    try:
+        job = await job_queue.submit(session, description, description_hash, provider)
+    except JobQueueFull as exc:
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": "5"}
+        ) from exc
+    body = await _job_status(session, job)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(body),
+        headers={"Location": f"{router.prefix}/jobs/{job.id}"},
+    )
+
+
+async def _job_status(session: AsyncSession, job: SurveyJob) -> SurveyJobStatus:
+    data = None
+    if job.status == "succeeded" and job.survey_id is not None:
+        data = await survey_cache.fetch(job.survey_id)
+        if data is None:
+            survey = await load_survey(session, job.survey_id)
+            if survey is not None:
+                data = _ensure_valid_survey_json(survey)
+                survey_cache.put(survey.id, survey.description_hash, data)
+    return SurveyJobStatus(
+        id=job.id,
+        status=job.status,
+        survey_id=job.survey_id,
+        survey=data,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+def _ndjson(event: dict) -> bytes:
+    return orjson.dumps(event) + b"\n"
+
+
+@router.post("/generate:stream", status_code=status.HTTP_200_OK)
+async def generate_survey_stream(
+    payload: SurveyGenerateRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+    provider: LLMProvider = Depends(get_provider),
+    _: None = Depends(rate_limit_dep),
+) -> StreamingResponse:
+    """Stream a survey as NDJSON events: ``title``, one ``question`` per
+    question as soon as the provider has produced it, then the persisted
+    ``survey`` (or an ``error``). Cache hits, and briefs already being
+    generated by another request, emit the ``survey`` event only.
+    """
+    started = time.perf_counter()
+    verify_token(request)
+    description = payload.description
+    normalized, description_hash = compute_hash(description)
+
+    cached = await survey_cache.fetch_entry_by_hash(description_hash)
+    if cached is None:
+        existing = await find_survey(session, description_hash)
+        if existing is not None:
+            data = _ensure_valid_survey_json(existing)
+            cached = survey_cache.put(existing.id, description_hash, data)
+
+    async def events() -> AsyncIterator[bytes]:
+        if cached is not None:
+            access_tracker.touch(cached.survey_id)
+            yield _ndjson(
+                {"type": "survey", "cache_hit": True, "survey": cached.payload}
+            )
+            return
+
+        progress: asyncio.Queue[dict | None] = asyncio.Queue()
+
+        async def generate_and_store() -> tuple[SurveyModel, bool]:
+            survey_json, model_name = await stream_provider(
+                provider, description, progress.put_nowait
+            )
+            # The request's session is closed once the body starts streaming;
+            # store through a session owned by the stream itself.
+            async with session_factory() as store_session:
+                return await store_generated_survey(
+                    store_session,
+                    description,
+                    description_hash,
+                    model_name,
+                    survey_json,
+                    normalized=normalized,
+                )
+
+        # Only the leader of the flight streams questions; requests that join
+        # it get the stored survey once it is ready.
+        flight = asyncio.ensure_future(
+            survey_flights.do(description_hash, generate_and_store)
+        )
+        flight.add_done_callback(lambda _: progress.put_nowait(None))
+        first_question = True
+        try:
+            while (event := await progress.get()) is not None:
+                if event["type"] == "question" and first_question:
+                    first_question = False
+                    STREAM_FIRST_QUESTION_SECONDS.observe(time.perf_counter() - started)
+                yield _ndjson(event)
+            (survey, cache_hit), shared = await flight
+        except Exception as exc:
+            logger.warning("stream_generation_failed", error=str(exc))
+            yield _ndjson({"type": "error", "detail": "generation failed"})
+            return
+        finally:
+            flight.cancel()
+        data = _ensure_valid_survey_json(survey)
+        survey_cache.put(survey.id, description_hash, data)
+        cache_hit = cache_hit or shared
+        if cache_hit:
+            access_tracker.touch(survey.id)
+        yield _ndjson({"type": "survey", "cache_hit": cache_hit, "survey": data})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"X-Cache-Hit": "1" if cached is not None else "0"},
+    )
+
+
+@router.post("/generate:batch", response_model=SurveyBatchGenerateResponse)
+async def generate_survey_batch(
+    payload: SurveyBatchGenerateRequest,
     request: Request,
     session: AsyncSession = Depends(get_session),
     provider: LLMProvider = Depends(get_provider),
     _: None = Depends(rate_limit_dep),
 ) -> dict:
     verify_token(request)
-    survey, cache_hit = await generate_or_get_survey(
-        payload.description, session, provider
+    items: list[SurveyBatchItem | None] = []
+    pending: list[int] = []
+    pending_hashed: list[tuple[str, str]] = []
+    for idx, description in enumerate(payload.descriptions):
+        normalized, description_hash = compute_hash(description)
+        cached = await survey_cache.fetch_entry_by_hash(description_hash)
+        if cached is None:
+            items.append(None)
+            pending.append(idx)
+            pending_hashed.append((normalized, description_hash))
+        else:
+            access_tracker.touch(cached.survey_id)
+            items.append(
+                SurveyBatchItem(
+                    description=description,
+                    status="cached",
+                    cache_hit=True,
+                    survey=cached.payload,
+                )
+            )
+
+    key = client_key(request)
+
+    async def charge(misses: int) -> None:
+        # One unit per distinct brief that reaches the provider; the
+        # dependency already charged the first.
+        if misses > 1:
+            await rate_limiter.check(key, cost=misses - 1)
+
+    results = await generate_or_get_surveys(
+        [payload.descriptions[idx] for idx in pending],
+        session,
+        provider,
+        concurrency=settings.batch_concurrency,
+        hashed=pending_hashed,
+        charge=charge,
     )
-    response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
-    response.status_code = status.HTTP_200_OK if cache_hit else status.HTTP_201_CREATED
-    data = await _ensure_valid_survey_json(survey, session)
-    return data
+    for idx, result in zip(pending, results):
+        if result.survey is None:
+            logger.warning("batch_item_failed", error=result.error)
+            items[idx] = SurveyBatchItem(
+                description=result.description,
+                status="error",
+                cache_hit=False,
+                error="generation failed",
+            )
+            continue
+        data = _ensure_valid_survey_json(result.survey)
+        survey_cache.put(result.survey.id, result.description_hash, data)
+        if result.cache_hit:
+            access_tracker.touch(result.survey.id)
+        items[idx] = SurveyBatchItem(
+            description=result.description,
+            status="cached" if result.cache_hit else "created",
+            cache_hit=result.cache_hit,
+            survey=data,
+        )
+    return {"items": items}
+
+
+@router.get("/jobs/{job_id}", response_model=SurveyJobStatus)
+async def get_job(
+    job_id: UUID,
+    request: Request,
+    wait: float = Query(0, ge=0, le=30),
+    session: AsyncSession = Depends(get_session),
+) -> SurveyJobStatus:
+    """Job status; with ``wait`` > 0, long-poll until it finishes or times out."""
+    verify_token(request)
+    job = await session.get(SurveyJob, uuid_key(job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+    deadline = time.monotonic() + wait
+    while job.status in ("queued", "running"):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # Release the connection while waiting; jobs run by another process
+        # are picked up by re-reading every second.
+        await session.rollback()
+        await job_queue.wait(job_id, min(remaining, 1.0))
+        await session.refresh(job)
+    return await _job_status(session, job)
+
+
+@router.get("", response_model=SurveyListResponse)
+async def list_survey_summaries(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    model_name: str | None = None,
+    question_type: QuestionType | None = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> dict:
+    """Newest-first survey summaries; pass ``next_cursor`` back as ``cursor``."""
+    verify_token(request)
+    try:
+        rows, next_cursor = await list_surveys(
+            session,
+            limit=limit,
+            cursor=cursor,
+            model_name=model_name,
+            question_type=question_type,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_surveys(
+    request: Request,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    gzip: bool = False,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(
+        get_read_session_factory
+    ),
+) -> StreamingResponse:
+    """Stream every survey (optionally a ``created_at`` range) as NDJSON.
+
+    ``created_to`` is exclusive; ``gzip=1`` downloads ``surveys.ndjson.gz``.
+    """
+    verify_token(request)
+
+    async def body() -> AsyncIterator[bytes]:
+        # The session lives as long as the stream and is closed when it ends
+        # or the client goes away.
+        async with session_factory() as session:
+            rows = iter_export_rows(session, created_from, created_to)
+            async for chunk in iter_ndjson(rows, compress=gzip):
+                yield chunk
+
+    if gzip:
+        return StreamingResponse(
+            body(),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="surveys.ndjson.gz"'},
+        )
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether ``If-None-Match`` names ``etag`` in any content coding.
+
+    The weak comparison applies, so W/ prefixes are ignored, and an ETag
+    suffixed for an encoding (by this route or ``CompressionMiddleware``)
+    matches the payload it encodes.
+    """
+    if not if_none_match:
+        return False
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return any(tag == "*" or etag_without_encoding(tag) == etag for tag in candidates)
+
+
+def _cache_control() -> str:
+    # Surveys never change once stored; only keep them out of shared caches
+    # when reads require a token.
+    scope = "private" if settings.api_token else "public"
+    return f"{scope}, max-age={settings.survey_http_max_age}, immutable"
 
 
 @router.get("/{survey_id}", response_model=Survey)
 async def get_survey(
     survey_id: UUID,
     request: Request,
-    session: AsyncSession = Depends(get_session),
-) -> dict:
+    session: AsyncSession = Depends(get_read_session),
+    primary: AsyncSession = Depends(get_session),
+) -> Response:
+    """Return a stored survey with a strong ETag; ``If-None-Match`` answers 304.
+
+    Cached entries are answered from their stored body, precompressed
+    encodings (built on the first read) and ETag without touching the database
+    or compressing per request. A replica miss is retried on the primary, so a
+    survey just created is not a 404 while the replica catches up.
+    """
     verify_token(request)
-    survey = await session.get(SurveyModel, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Not found")
-    data = await _ensure_valid_survey_json(survey, session)
-    return data
+    entry = await survey_cache.fetch_entry(survey_id)
+    CACHE_LOOKUPS.inc(layer="l1", result="miss" if entry is None else "hit")
+    if entry is None:
+        survey = await load_survey(session, survey_id)
+        if survey is None and session is not primary:
+            survey = await load_survey(primary, survey_id)
+        if not survey:
+            raise HTTPException(status_code=404, detail="Not found")
+        data = _ensure_valid_survey_json(survey)
+        entry = survey_cache.put(survey.id, survey.description_hash, data)
+    access_tracker.touch(entry.survey_id)
+
+    encoded = await survey_cache.encodings(entry)
+    encoding = negotiate(request.headers.get("Accept-Encoding"), encoded)
+    etag = etag_for_encoding(entry.etag, encoding)
+    headers = {"ETag": etag, "Cache-Control": _cache_control()}
+    if encoded:
+        headers["Vary"] = "Accept-Encoding"
+    if _etag_matches(request.headers.get("If-None-Match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is None:
+        return Response(entry.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(encoded[encoding], media_type="application/json", headers=headers)
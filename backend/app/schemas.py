@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import List, Literal, Optional
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+# Bump when the stored survey_json shape changes; rows below it are normalized
+# by ``python -m app.cli.backfill``.
+SURVEY_SCHEMA_VERSION = 1
 
 
 class Scale(BaseModel):
@@ -12,17 +17,20 @@ class Scale(BaseModel):
     labels: List[str] | None = None
 
 
+QuestionType = Literal[
+    "multiple_choice",
+    "rating",
+    "open_text",
+    "likert",
+    "yes_no",
+    "checkboxes",
+    "matrix",
+]
+
+
 class Question(BaseModel):
     id: UUID
-    type: Literal[
-        "multiple_choice",
-        "rating",
-        "open_text",
-        "likert",
-        "yes_no",
-        "checkboxes",
-        "matrix",
-    ]
+    type: QuestionType
     text: str
     required: bool
     options: Optional[List[str]] = None
@@ -37,5 +45,58 @@ class Survey(BaseModel):
     createdAt: str
 
 
+# Built once: the compiled validator and serializer are reused for every call.
+SURVEY_ADAPTER = TypeAdapter(Survey)
+
+
+def validate_survey(data: object) -> dict:
+    """Validate a survey payload and return it as JSON-compatible data."""
+    return SURVEY_ADAPTER.dump_python(SURVEY_ADAPTER.validate_python(data), mode="json")
+
+
 class SurveyGenerateRequest(BaseModel):
     description: str = Field(min_length=5, max_length=300)
+
+
+BriefText = Annotated[str, Field(min_length=5, max_length=300)]
+
+
+class SurveyBatchGenerateRequest(BaseModel):
+    descriptions: List[BriefText] = Field(min_length=1, max_length=50)
+
+
+class SurveyBatchItem(BaseModel):
+    description: str
+    status: Literal["created", "cached", "error"]
+    cache_hit: bool
+    survey: Optional[Survey] = None
+    error: Optional[str] = None
+
+
+class SurveyBatchGenerateResponse(BaseModel):
+    items: List[SurveyBatchItem]
+
+
+class SurveyJobStatus(BaseModel):
+    id: UUID
+    status: Literal["queued", "running", "succeeded", "failed"]
+    survey_id: Optional[UUID] = None
+    survey: Optional[Survey] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class SurveySummary(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    id: UUID
+    title: Optional[str] = None
+    description: str
+    model_name: str
+    created_at: datetime
+
+
+class SurveyListResponse(BaseModel):
+    items: List[SurveySummary]
+    next_cursor: Optional[str] = None
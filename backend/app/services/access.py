@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config import Settings, get_settings, subscribe
+from ..db import AsyncSessionLocal
+from ..models import Survey, uuid_key
+from ..utils.metrics import SURVEY_ACCESS_UPDATES
+
+logger = structlog.get_logger(__name__)
+
+
+class AccessTracker:
+    """Record survey reads and write ``last_accessed_at`` in batches.
+
+    ``touch`` only adds the id to an in-memory set, so repeated reads of a hot
+    survey between two flushes cost one row update. Every ``flush_interval``
+    seconds a background task (started lazily on the running loop) stamps all
+    touched rows with one ``UPDATE ... WHERE id IN (...)`` per ``batch_size``
+    ids, in id order so concurrent workers lock rows in the same order. Ids
+    beyond ``max_pending`` are dropped until the next flush.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 30.0,
+        max_pending: int = 100000,
+        batch_size: int = 500,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self._pending: set[str] = set()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def touch(self, survey_id: object | None) -> None:
+        if survey_id is None:
+            return
+        key = str(survey_id)
+        if key not in self._pending:
+            if len(self._pending) >= self.max_pending:
+                SURVEY_ACCESS_UPDATES.inc(outcome="dropped")
+                return
+            self._pending.add(key)
+        self.start()
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._task = loop.create_task(self._run())
+
+    async def flush(self) -> int:
+        """Stamp every survey touched since the last flush; return the count."""
+        pending, self._pending = sorted(self._pending), set()
+        if not pending:
+            return 0
+        now = datetime.now(timezone.utc)
+        try:
+            async with self.session_factory() as session:
+                for start in range(0, len(pending), self.batch_size):
+                    ids = [
+                        uuid_key(key)
+                        for key in pending[start : start + self.batch_size]
+                    ]
+                    await session.execute(
+                        update(Survey).where(Survey.id.in_(ids))
+                        # A read is not a modification: keep updated_at as is.
+                        .values(last_accessed_at=now, updated_at=Survey.updated_at)
+                    )
+                await session.commit()
+        except Exception:
+            # Retry these ids with the next flush.
+            self._pending.update(pending[: self.max_pending - len(self._pending)])
+            raise
+        SURVEY_ACCESS_UPDATES.inc(len(pending), outcome="written")
+        return len(pending)
+
+    async def stop(self) -> int:
+        """Cancel the background task and write what is still pending."""
+        task, self._task = self._task, None
+        # A task left on an earlier, closed loop is simply dropped.
+        if task is not None and self._loop is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._loop = None
+        return await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("access_flush_failed")
+
+
+settings = get_settings()
+access_tracker = AccessTracker(
+    flush_interval=settings.access_flush_interval,
+    max_pending=settings.access_max_pending,
+)
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    access_tracker.flush_interval = new.access_flush_interval
+    access_tracker.max_pending = new.access_max_pending
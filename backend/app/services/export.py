@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import zlib
+from datetime import datetime
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Survey
+
+EXPORT_COLUMNS = (
+    Survey.id,
+    Survey.description,
+    Survey.description_hash,
+    Survey.model_name,
+    Survey.schema_version,
+    Survey.created_at,
+    Survey.survey_json,
+)
+
+
+async def iter_export_rows(
+    session: AsyncSession,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[dict]:
+    """Yield survey rows as dicts, in ``(created_at, id)`` order.
+
+    Rows are read through a server-side cursor ``batch_size`` at a time as
+    plain column tuples (no ORM identity map), so memory stays flat however
+    large the table is. ``created_to`` is exclusive.
+    """
+    stmt = select(*EXPORT_COLUMNS).order_by(Survey.created_at, Survey.id)
+    if created_from is not None:
+        stmt = stmt.where(Survey.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Survey.created_at < created_to)
+    result = await session.stream(
+        stmt.execution_options(stream_results=True, yield_per=batch_size)
+    )
+    async for row in result:
+        yield row._asdict()
+
+
+async def iter_ndjson(
+    rows: AsyncIterator[dict], compress: bool = False, chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """Encode rows as NDJSON in chunks of about ``chunk_size`` bytes.
+
+    With ``compress`` the chunks form one gzip stream, compressed incrementally.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = bytearray()
+    async for row in rows:
+        buffer += orjson.dumps(row, option=orjson.OPT_NAIVE_UTC) + b"\n"
+        if len(buffer) >= chunk_size:
+            chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+    tail = bytes(buffer)
+    if compressor is not None:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import func, literal, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config import Settings, get_settings, subscribe
+from ..db import AsyncSessionLocal
+from ..llm.providers import LLMProvider
+from ..models import SurveyJob
+from .survey_service import generate_or_get_survey
+
+logger = structlog.get_logger(__name__)
+
+
+class JobQueueFull(Exception):
+    """The in-process job queue has reached its configured depth."""
+
+
+class JobQueue:
+    """Run survey generation jobs on a pool of background workers.
+
+    Job state lives in the ``survey_jobs`` table so any API process can report
+    it; the queue itself is in-process and bounded by ``max_depth``. Workers
+    are started lazily on the running event loop by the first submission (or
+    by the app lifespan), and jobs still pending in the table are re-queued by
+    ``recover`` after a restart. A unique partial index allows one pending
+    job per brief, and a job is claimed atomically (``queued`` to
+    ``running``) before it runs, so it runs once even when several processes
+    have queued it.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_depth: int,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        stale_after: float = 900.0,
+    ) -> None:
+        self.workers = workers
+        self.max_depth = max_depth
+        self.stale_after = stale_after
+        self.session_factory = session_factory
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._done: dict[str, asyncio.Event] = {}
+        self._feeder: asyncio.Task | None = None
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(self.max_depth)
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs stay pending in the table."""
+        tasks, self._tasks = self._tasks, []
+        if self._feeder is not None:
+            tasks.append(self._feeder)
+            self._feeder = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._loop = None
+
+    async def submit(
+        self,
+        session: AsyncSession,
+        description: str,
+        description_hash: str,
+        provider: LLMProvider,
+    ) -> SurveyJob:
+        """Return the job for this brief, enqueueing a new one if needed.
+
+        A queued, running or succeeded job for the same description hash is
+        reused; only failed jobs are retried with a new job.
+        """
+        existing = await self._find_job(session, description_hash)
+        if existing is not None:
+            return existing
+
+        self.start()
+        if self._queue.full():
+            raise JobQueueFull("Generation queue is full")
+        job = SurveyJob(
+            description=description, description_hash=description_hash, status="queued"
+        )
+        session.add(job)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # A concurrent submission for this brief inserted its job first.
+            await session.rollback()
+            existing = await self._find_job(session, description_hash)
+            if existing is None:
+                raise
+            return existing
+        try:
+            self._queue.put_nowait((job.id, provider))
+        except asyncio.QueueFull:
+            # Filled up while committing: fail the row rather than orphan it
+            # (the next submission for this brief creates a new job).
+            job.status, job.error = "failed", "Generation queue is full"
+            await session.commit()
+            raise JobQueueFull("Generation queue is full") from None
+        return job
+
+    async def _find_job(
+        self, session: AsyncSession, description_hash: str
+    ) -> SurveyJob | None:
+        stmt = (
+            select(SurveyJob)
+            .where(
+                SurveyJob.description_hash == description_hash,
+                SurveyJob.status != "failed",
+            )
+            .order_by(SurveyJob.created_at.desc())
+            .limit(1)
+        )
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+    async def recover(self, provider: LLMProvider) -> int:
+        """Queue pending jobs, e.g. after a restart; return how many are pending.
+
+        ``running`` jobs are only taken back once they are older than
+        ``stale_after`` (their process is assumed gone); jobs still running in
+        a live process are left alone. The backlog is fed to the queue a page
+        at a time as the workers drain it, so it may exceed ``max_depth``.
+        Every process may queue the same job, but only one claims it.
+        """
+        self.start()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+        async with self.session_factory() as session:
+            await session.execute(
+                update(SurveyJob)
+                .where(SurveyJob.status == "running", SurveyJob.updated_at < cutoff)
+                .values(status="queued")
+            )
+            await session.commit()
+            pending, newest = (
+                await session.execute(
+                    select(
+                        func.count(SurveyJob.id), func.max(SurveyJob.created_at)
+                    ).where(SurveyJob.status == "queued")
+                )
+            ).one()
+        if pending:
+            if self._feeder is not None:
+                self._feeder.cancel()
+            self._feeder = self._loop.create_task(self._feed(provider, newest))
+        return pending
+
+    async def _feed(self, provider: LLMProvider, newest: datetime) -> None:
+        # Keyset pages on (created_at, id) up to the newest job of the
+        # backlog; jobs submitted since are queued by ``submit`` itself.
+        queue = self._queue
+        after = None
+        while True:
+            stmt = select(SurveyJob.created_at, SurveyJob.id).where(
+                SurveyJob.status == "queued", SurveyJob.created_at <= newest
+            )
+            if after is not None:
+                stmt = stmt.where(
+                    tuple_(SurveyJob.created_at, SurveyJob.id)
+                    # Bind with the column types (tuple elements are not coerced).
+                    > tuple_(
+                        literal(after[0], SurveyJob.created_at.type),
+                        literal(after[1], SurveyJob.id.type),
+                    )
+                )
+            stmt = stmt.order_by(SurveyJob.created_at, SurveyJob.id)
+            async with self.session_factory() as session:
+                page = (await session.execute(stmt.limit(self.max_depth))).all()
+            if not page:
+                return
+            for _, job_id in page:
+                # Waits for the workers to make room.
+                await queue.put((job_id, provider))
+            after = page[-1]
+
+    async def wait(self, job_id: object, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for a job run by this process."""
+        key = str(job_id)
+        event = self._done.setdefault(key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if self._done.get(key) is event and not event.is_set():
+                del self._done[key]
+
+    async def run_job(self, job_id: object, provider: LLMProvider) -> None:
+        async with self.session_factory() as session:
+            # Claim the job; another worker or process may already have.
+            claimed = (
+                await session.execute(
+                    update(SurveyJob)
+                    .where(SurveyJob.id == job_id, SurveyJob.status == "queued")
+                    .values(status="running")
+                    .returning(SurveyJob.description, SurveyJob.description_hash)
+                )
+            ).one_or_none()
+            await session.commit()
+            if claimed is None:
+                return
+
+            description, description_hash = claimed
+            try:
+                survey, _ = await generate_or_get_survey(
+                    description,
+                    session,
+                    provider,
+                    description_hash=description_hash,
+                )
+            except Exception as exc:
+                await session.rollback()
+                values = {"status": "failed", "error": str(exc) or type(exc).__name__}
+            else:
+                values = {"status": "succeeded", "survey_id": survey.id}
+            await session.execute(
+                update(SurveyJob).where(SurveyJob.id == job_id).values(**values)
+            )
+            await session.commit()
+        event = self._done.pop(str(job_id), None)
+        if event is not None:
+            event.set()
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            job_id, provider = await queue.get()
+            try:
+                await self.run_job(job_id, provider)
+            except Exception:
+                logger.exception("job_failed", job_id=str(job_id))
+            finally:
+                queue.task_done()
+
+
+settings = get_settings()
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_depth=settings.job_queue_depth,
+    stale_after=settings.job_stale_after_seconds,
+)
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    job_queue.stale_after = new.job_stale_after_seconds
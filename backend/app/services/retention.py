@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import structlog
+from sqlalchemy import Text, cast, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionLocal
+from ..models import SURVEY_LAST_USED, USE_POSTGRES, Survey, SurveyJob
+from ..utils.cache import survey_cache
+from ..utils.near_duplicate import near_duplicate_index
+from .export import EXPORT_COLUMNS
+
+logger = structlog.get_logger(__name__)
+
+# Called with each batch of rows (as dicts) before it is deleted.
+ArchiveRows = Callable[[list[dict]], Awaitable[None]]
+
+
+def _row_bytes():
+    """Storage taken by a row's payload and brief (on-disk size on Postgres)."""
+    if USE_POSTGRES:
+        return func.pg_column_size(Survey.survey_json) + func.pg_column_size(
+            Survey.description
+        )
+    return func.length(cast(Survey.survey_json, Text)) + func.length(Survey.description)
+
+
+async def _prune_batch(
+    session: AsyncSession,
+    limit: int,
+    cutoff: datetime | None,
+    archive: ArchiveRows | None,
+) -> tuple[int, int] | None:
+    """Delete up to ``limit`` of the coldest rows; return (rows, bytes).
+
+    Returns None when no row is cold enough. Only rows the delete actually
+    removed are archived, and jobs pointing at them go in the same
+    transaction so the brief is generated again on its next async request.
+    """
+    stmt = select(Survey.id)
+    if cutoff is not None:
+        stmt = stmt.where(SURVEY_LAST_USED < cutoff)
+    ids = (
+        (await session.execute(stmt.order_by(SURVEY_LAST_USED).limit(limit)))
+        .scalars()
+        .all()
+    )
+    if not ids:
+        return None
+    condition = Survey.id.in_(ids)
+    if cutoff is not None:
+        # Skip rows read again since they were selected.
+        condition = condition & (SURVEY_LAST_USED < cutoff)
+    columns = (
+        EXPORT_COLUMNS if archive is not None else (Survey.id, Survey.description_hash)
+    )
+    rows = (
+        await session.execute(
+            delete(Survey)
+            .where(condition)
+            .returning(*columns, _row_bytes().label("row_bytes"))
+        )
+    ).all()
+    if rows:
+        await session.execute(
+            delete(SurveyJob).where(SurveyJob.survey_id.in_([row.id for row in rows]))
+        )
+        if archive is not None:
+            await archive([_archived(row) for row in rows])
+    await session.commit()
+    await _evict({row.id: row.description_hash for row in rows})
+    return len(rows), sum(row.row_bytes or 0 for row in rows)
+
+
+async def _evict(deleted: dict) -> None:
+    # Reaches this process and the shared store; other workers' local caches
+    # keep an entry until it expires (SURVEY_CACHE_TTL_SECONDS).
+    for survey_id, description_hash in deleted.items():
+        await survey_cache.invalidate(survey_id, description_hash)
+        near_duplicate_index.remove(description_hash)
+
+
+def _archived(row) -> dict:
+    values = row._asdict()
+    values.pop("row_bytes")
+    return values
+
+
+async def prune_surveys(
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ttl_seconds: float | None = None,
+    max_rows: int | None = None,
+    batch_size: int = 500,
+    pause: float = 0.0,
+    archive: ArchiveRows | None = None,
+) -> dict[str, float]:
+    """Delete cold surveys in small batches, one short transaction each.
+
+    A row's coldness is ``coalesce(last_accessed_at, created_at)``. Rows not
+    read for ``ttl_seconds`` go first; then, if more than ``max_rows`` remain,
+    the coldest are removed down to that count. ``archive`` receives each
+    batch of deleted rows before the delete commits, and ``pause`` seconds are
+    slept between batches to leave room for foreground traffic. Deleted
+    surveys are evicted from the survey cache and the near-duplicate index.
+    """
+    start = time.perf_counter()
+    pruned = reclaimed = 0
+
+    async def run(limit_total: int | None, cutoff: datetime | None) -> None:
+        nonlocal pruned, reclaimed
+        remaining = limit_total
+        while remaining is None or remaining > 0:
+            limit = batch_size if remaining is None else min(batch_size, remaining)
+            async with session_factory() as session:
+                batch = await _prune_batch(session, limit, cutoff, archive)
+            if batch is None:
+                return
+            rows, size = batch
+            pruned += rows
+            reclaimed += size
+            if remaining is not None:
+                remaining -= rows
+            logger.info("retention_batch", pruned=pruned, bytes_reclaimed=reclaimed)
+            if pause:
+                await asyncio.sleep(pause)
+
+    if ttl_seconds:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+        await run(None, cutoff)
+    if max_rows is not None:
+        async with session_factory() as session:
+            total = (await session.execute(select(func.count(Survey.id)))).scalar_one()
+        if total > max_rows:
+            await run(total - max_rows, None)
+    return {
+        "rows_pruned": pruned,
+        "bytes_reclaimed": reclaimed,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
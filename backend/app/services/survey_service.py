@@ -1,43 +1,521 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+import asyncio
+import base64
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Sequence
+
+import orjson
+from sqlalchemy import Row, exists, func, insert, inspect, literal, select, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..llm.providers import LLMProvider
-from ..models import Survey
+from ..config import Settings, get_settings, subscribe
+from ..llm.providers import (
+    LLMProvider,
+    _normalize_survey_dict,
+    generate_survey,
+    stream_survey_events,
+)
+from ..models import USE_POSTGRES, Survey, uuid_key
+from ..schemas import SURVEY_SCHEMA_VERSION, validate_survey
+from ..utils.hashing import normalize_description
 from ..utils.idempotency import compute_hash
+from ..utils.metrics import CACHE_LOOKUPS, LLM_REQUESTS, stage
+from ..utils.near_duplicate import near_duplicate_index
+from ..utils.singleflight import SingleFlight
+from .write_behind import WriteBehindQueue
+
+# Coalesces concurrent cache misses for the same brief within this process.
+survey_flights = SingleFlight()
+
+SURVEY_ID_NAMESPACE = uuid.UUID("5b0e7a8c-2f4d-5c1e-9a3b-6d8f0e2c4a71")
+
+
+def survey_id_for(description_hash: str) -> uuid.UUID:
+    """Id of the survey for a brief, the same in every process.
+
+    Writers racing on the same brief (other workers, the write-behind queue)
+    hand out the same id whichever row wins the insert, so an id returned to
+    a client always resolves.
+    """
+    return uuid.uuid5(SURVEY_ID_NAMESPACE, description_hash)
 
 
 async def generate_or_get_survey(
-    description: str, session: AsyncSession, provider: LLMProvider
+    description: str,
+    session: AsyncSession,
+    provider: LLMProvider,
+    read_session: AsyncSession | None = None,
+    description_hash: str | None = None,
+    normalized: str | None = None,
+    looked_up: bool = False,
 ) -> tuple[Survey, bool]:
     """Generate a new survey or return cached one.
 
+    The cache lookup runs on ``read_session`` (e.g. a replica) when given;
+    inserts always go through ``session``. Concurrent misses for the same
+    description hash share a single provider call; only the caller that
+    generated the survey sees ``cache_hit=False``. Pass ``description_hash``
+    (and ``normalized``) when the caller has already hashed the brief, and
+    ``looked_up=True`` when it has already run ``find_survey`` and missed.
+
+    With write-behind enabled, a new survey is returned as soon as it is
+    queued (a transient ``Survey``) and briefs still in the queue are answered
+    from it.
+
     Returns (Survey, cache_hit).
     """
 
-    _, description_hash = compute_hash(description)
+    if description_hash is None:
+        with stage("hash"):
+            normalized, description_hash = compute_hash(description)
 
-    stmt = select(Survey).where(Survey.description_hash == description_hash)
-    result = await session.execute(stmt)
-    existing = result.scalar_one_or_none()
-    if existing:
-        return existing, True
+    if not looked_up:
+        existing = await find_survey(read_session or session, description_hash)
+        if existing is not None:
+            return existing, True
+    # Nothing is loaded yet: hand the connection back to the pool instead of
+    # holding it for the whole provider call.
+    await (read_session or session).rollback()
 
-    survey_json = await provider.generate(description)
-    survey = Survey(
-        description=description,
-        description_hash=description_hash,
-        model_name=provider.model_name,
-        survey_json=survey_json,
+    async def generate_and_store() -> tuple[Survey, bool]:
+        survey_json, model_name = await call_provider(provider, description)
+        if write_behind.enabled:
+            survey = new_survey(description, description_hash, model_name, survey_json)
+            if write_behind.submit(survey):
+                _index_survey(description_hash, description, normalized)
+                return survey, False
+            # Queue full: fall back to writing synchronously.
+        return await store_generated_survey(
+            session,
+            description,
+            description_hash,
+            model_name,
+            survey_json,
+            normalized=normalized,
+        )
+
+    (survey, cache_hit), shared = await survey_flights.do(
+        description_hash, generate_and_store
     )
+    if shared and inspect(survey).transient:
+        return survey, True
+    if shared:
+        # The row was loaded by the leader's session; attach a copy to ours.
+        return await session.merge(survey, load=False), True
+    return survey, cache_hit
+
+
+async def find_survey(session: AsyncSession, description_hash: str) -> Survey | None:
+    """The stored survey for a brief: write-behind queue first, then the table."""
+    pending = write_behind.get(description_hash)
+    if pending is not None:
+        CACHE_LOOKUPS.inc(layer="write_behind", result="hit")
+        return pending
+    stmt = select(Survey).where(Survey.description_hash == description_hash)
+    with stage("lookup"):
+        existing = (await session.execute(stmt)).scalar_one_or_none()
+    CACHE_LOOKUPS.inc(layer="db", result="hit" if existing else "miss")
+    return existing
+
+
+async def call_provider(provider: LLMProvider, description: str) -> tuple[dict, str]:
+    """Generate a survey, recording duration and outcome; return (survey, model)."""
+    try:
+        with stage("provider"):
+            survey_json, model_name = await generate_survey(provider, description)
+    except Exception:
+        LLM_REQUESTS.inc(provider=provider.model_name, outcome="error")
+        raise
+    LLM_REQUESTS.inc(provider=model_name, outcome="ok")
+    return survey_json, model_name
+
+
+async def stream_provider(
+    provider: LLMProvider, description: str, emit: Callable[[dict], None]
+) -> tuple[dict, str]:
+    """Streaming counterpart of ``call_provider``.
+
+    ``emit`` receives each ``title`` and ``question`` event as the provider
+    produces it; returns the full (survey, model) once the stream ends.
+    """
+    survey_json, model_name = None, provider.model_name
+    try:
+        with stage("provider"):
+            async for event in stream_survey_events(provider, description):
+                if event["type"] == "survey":
+                    survey_json = event["survey"]
+                    model_name = event.get("model_name", model_name)
+                else:
+                    emit(event)
+        if survey_json is None:
+            raise ValueError("Provider stream ended without a survey")
+    except Exception:
+        LLM_REQUESTS.inc(provider=provider.model_name, outcome="error")
+        raise
+    LLM_REQUESTS.inc(provider=model_name, outcome="ok")
+    return survey_json, model_name
+
+
+async def store_generated_survey(
+    session: AsyncSession,
+    description: str,
+    description_hash: str,
+    model_name: str,
+    survey_json: dict,
+    normalized: str | None = None,
+) -> tuple[Survey, bool]:
+    """Persist a provider-validated payload; return (Survey, cache_hit).
+
+    If another writer stored the same hash first, that row is returned as a
+    cache hit instead.
+    """
+    survey = new_survey(description, description_hash, model_name, survey_json)
     session.add(survey)
     try:
-        await session.commit()
+        with stage("commit"):
+            await session.commit()
     except IntegrityError:
         await session.rollback()
+        stmt = select(Survey).where(Survey.description_hash == description_hash)
         res = await session.execute(stmt)
         return res.scalar_one(), True
     await session.refresh(survey)
+    _index_survey(description_hash, description, normalized)
     return survey, False
+
+
+def new_survey(
+    description: str, description_hash: str, model_name: str, survey_json: dict
+) -> Survey:
+    """Build a (transient) row for a provider-validated payload."""
+    survey_id = survey_id_for(description_hash)
+    return Survey(
+        id=survey_id,
+        description=description,
+        description_hash=description_hash,
+        model_name=model_name,
+        survey_json=with_survey_id(survey_json, survey_id),
+        # Providers return payloads already validated against the schema.
+        schema_version=SURVEY_SCHEMA_VERSION,
+    )
+
+
+async def load_survey(session: AsyncSession, survey_id: uuid.UUID) -> Survey | None:
+    """Load a survey by id, including ones still waiting in the write-behind queue."""
+    pending = write_behind.get_by_id(survey_id)
+    if pending is not None:
+        return pending
+    return await session.get(Survey, uuid_key(survey_id))
+
+
+@dataclass
+class BatchResult:
+    description: str
+    description_hash: str
+    survey: Survey | None
+    cache_hit: bool
+    error: str | None = None
+
+
+async def generate_or_get_surveys(
+    descriptions: Sequence[str],
+    session: AsyncSession,
+    provider: LLMProvider,
+    concurrency: int = 4,
+    hashed: Sequence[tuple[str, str]] | None = None,
+    charge: Callable[[int], Awaitable[None]] | None = None,
+) -> list[BatchResult]:
+    """Batch counterpart of ``generate_or_get_survey``.
+
+    The batch is deduplicated by description hash, cached surveys are loaded
+    with a single ``IN`` query, misses are generated with at most
+    ``concurrency`` provider calls in flight, and new rows are written with one
+    bulk insert that ignores hashes inserted concurrently by someone else.
+    Misses share ``survey_flights`` with single generations, so a brief being
+    generated elsewhere is awaited instead of generated again.
+    Results are returned in input order; repeated briefs report a cache hit.
+    ``hashed``, when given, holds the ``compute_hash`` result of each of
+    ``descriptions``. ``charge`` is awaited with the number of misses before
+    any provider call and may raise to reject the batch.
+    """
+    if hashed is None:
+        hashed = [compute_hash(d) for d in descriptions]
+    hashes = [description_hash for _, description_hash in hashed]
+    unique: dict[str, str] = {}
+    normalized: dict[str, str] = {}
+    for description, (norm, description_hash) in zip(descriptions, hashed):
+        unique.setdefault(description_hash, description)
+        normalized.setdefault(description_hash, norm)
+
+    found = await get_surveys_by_hash(session, unique)
+    for description_hash in unique:
+        pending = write_behind.get(description_hash)
+        if pending is not None and description_hash not in found:
+            found[description_hash] = pending
+    misses = [h for h in unique if h not in found]
+    if charge is not None:
+        await charge(len(misses))
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def generate(description_hash: str) -> tuple[dict, str]:
+        async with semaphore:
+            return await call_provider(provider, unique[description_hash])
+
+    async def generate_and_store(led: list[str]) -> dict[str, object]:
+        outcomes = await asyncio.gather(
+            *(generate(h) for h in led), return_exceptions=True
+        )
+        stored: dict[str, object] = {}
+        rows = []
+        for description_hash, outcome in zip(led, outcomes):
+            if isinstance(outcome, BaseException):
+                stored[description_hash] = outcome
+                continue
+            survey_json, model_name = outcome
+            survey_id = survey_id_for(description_hash)
+            rows.append(
+                {
+                    "id": survey_id,
+                    "description": unique[description_hash],
+                    "description_hash": description_hash,
+                    "model_name": model_name,
+                    "survey_json": with_survey_id(survey_json, survey_id),
+                    "schema_version": SURVEY_SCHEMA_VERSION,
+                }
+            )
+        if rows:
+            await bulk_insert_surveys(session, rows)
+            await session.commit()
+            inserted = await get_surveys_by_hash(
+                session, [r["description_hash"] for r in rows]
+            )
+            for row in rows:
+                survey = inserted.get(row["description_hash"])
+                if survey is None:
+                    stored[row["description_hash"]] = LookupError("survey not stored")
+                    continue
+                # Ids are shared across writers; the payload tells whose row won.
+                created = survey.survey_json == row["survey_json"]
+                stored[row["description_hash"]] = (survey, not created)
+                if created:
+                    description_hash = row["description_hash"]
+                    _index_survey(
+                        description_hash,
+                        row["description"],
+                        normalized[description_hash],
+                    )
+        return stored
+
+    errors: dict[str, str] = {}
+    created: set[str] = set()
+    flights = await survey_flights.do_many(misses, generate_and_store)
+    for description_hash, (outcome, shared) in flights.items():
+        if isinstance(outcome, BaseException):
+            errors[description_hash] = str(outcome) or type(outcome).__name__
+            continue
+        survey, cache_hit = outcome
+        if shared and not inspect(survey).transient:
+            # Loaded by another caller's session; attach a copy to ours.
+            survey = await session.merge(survey, load=False)
+        found[description_hash] = survey
+        if not (shared or cache_hit):
+            created.add(description_hash)
+
+    results = []
+    seen: set[str] = set()
+    for description, description_hash in zip(descriptions, hashes):
+        first = description_hash not in seen
+        seen.add(description_hash)
+        results.append(
+            BatchResult(
+                description=description,
+                description_hash=description_hash,
+                survey=found.get(description_hash),
+                cache_hit=not (first and description_hash in created),
+                error=errors.get(description_hash),
+            )
+        )
+    return results
+
+
+async def get_surveys_by_hash(
+    session: AsyncSession, description_hashes: Iterable[str]
+) -> dict[str, Survey]:
+    """Load surveys for many description hashes with a single query."""
+    hashes = list(description_hashes)
+    if not hashes:
+        return {}
+    stmt = select(Survey).where(Survey.description_hash.in_(hashes))
+    result = await session.execute(stmt)
+    return {survey.description_hash: survey for survey in result.scalars()}
+
+
+async def bulk_insert_surveys(session: AsyncSession, rows: list[dict]) -> None:
+    """Insert many survey rows, skipping briefs that already exist.
+
+    Uses ``ON CONFLICT DO NOTHING`` on Postgres and SQLite (a stored brief
+    clashes on both its hash and its id); other backends fall back to a plain
+    multi-row insert.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        await session.execute(insert(Survey), rows)
+        return
+    await session.execute(dialect_insert(Survey).on_conflict_do_nothing(), rows)
+
+
+settings = get_settings()
+write_behind = WriteBehindQueue(
+    bulk_insert_surveys,
+    max_pending=settings.write_behind_max_pending,
+    batch_size=settings.write_behind_batch_size,
+    flush_interval=settings.write_behind_flush_interval,
+    enabled=settings.write_behind_enabled,
+)
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    write_behind.max_pending = new.write_behind_max_pending
+    write_behind.batch_size = new.write_behind_batch_size
+    write_behind.flush_interval = new.write_behind_flush_interval
+
+
+class InvalidCursor(ValueError):
+    """A listing cursor that was not produced by ``encode_cursor``."""
+
+
+def encode_cursor(created_at: datetime, survey_id: object) -> str:
+    raw = orjson.dumps([created_at.isoformat(), str(survey_id)])
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, object]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, survey_id = orjson.loads(raw)
+        return datetime.fromisoformat(created_at), uuid_key(uuid.UUID(survey_id))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def _has_question_type(question_type: str):
+    if USE_POSTGRES:
+        # JSONB containment, served by the jsonb_path_ops GIN index.
+        return Survey.survey_json.contains({"questions": [{"type": question_type}]})
+    questions = (
+        func.json_each(Survey.survey_json, "$.questions")
+        .table_valued("value")
+        .alias("questions")
+    )
+    return exists(
+        select(1)
+        .select_from(questions)
+        .where(func.json_extract(questions.c.value, "$.type") == question_type)
+    )
+
+
+async def list_surveys(
+    session: AsyncSession,
+    limit: int = 20,
+    cursor: str | None = None,
+    model_name: str | None = None,
+    question_type: str | None = None,
+) -> tuple[list[Row], str | None]:
+    """Newest-first page of survey summaries and the cursor of the next page.
+
+    Keyset pagination on ``(created_at, id)``: each page is an index range
+    scan no matter how deep, and only a projection of each row is read (the
+    title is extracted from ``survey_json`` in the database).
+    """
+    stmt = select(
+        Survey.id,
+        Survey.survey_json["title"].as_string().label("title"),
+        Survey.description,
+        Survey.model_name,
+        Survey.created_at,
+    )
+    if model_name is not None:
+        stmt = stmt.where(Survey.model_name == model_name)
+    if question_type is not None:
+        stmt = stmt.where(_has_question_type(question_type))
+    if cursor is not None:
+        created_at, survey_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Survey.created_at, Survey.id)
+            # Bind with the column types (tuple elements are not coerced).
+            < tuple_(
+                literal(created_at, Survey.created_at.type),
+                literal(survey_id, Survey.id.type),
+            )
+        )
+    stmt = stmt.order_by(Survey.created_at.desc(), Survey.id.desc()).limit(limit + 1)
+    rows = (await session.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def with_survey_id(survey_json: dict, survey_id: object) -> dict:
+    """Stamp the row id into the payload so clients can GET it back by ``id``."""
+    return {**survey_json, "id": str(survey_id)}
+
+
+def match_near_duplicate(
+    normalized: str, description_hash: str
+) -> tuple[str, float] | None:
+    """Return (description_hash, similarity) of a stored near-duplicate brief.
+
+    Takes the brief as returned by ``compute_hash``. Returns None when the
+    index is disabled, nothing is similar enough, or the brief itself is
+    already stored (an exact hit always wins).
+    """
+    if not near_duplicate_index.enabled:
+        return None
+    if description_hash in near_duplicate_index:
+        return None
+    return near_duplicate_index.query(normalized)
+
+
+async def load_near_duplicate_index(session: AsyncSession) -> int:
+    """Rebuild the near-duplicate index from the surveys table."""
+    near_duplicate_index.clear()
+    stmt = select(Survey.description_hash, Survey.description)
+    result = await session.stream(stmt.execution_options(yield_per=1000))
+    async for description_hash, description in result:
+        near_duplicate_index.add(description_hash, normalize_description(description))
+    return len(near_duplicate_index)
+
+
+def _index_survey(
+    description_hash: str, description: str, normalized: str | None = None
+) -> None:
+    if near_duplicate_index.enabled:
+        if normalized is None:
+            normalized = normalize_description(description)
+        near_duplicate_index.add(description_hash, normalized)
+
+
+def normalize_survey_payload(data: object, description: str) -> dict:
+    """Validate a stored payload, normalizing legacy or non-conforming shapes."""
+    with stage("validate"):
+        try:
+            return validate_survey(data)
+        except Exception:
+            normalized = _normalize_survey_dict(
+                data if isinstance(data, dict) else {}, description
+            )
+            return validate_survey(normalized)
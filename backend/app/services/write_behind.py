@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Awaitable, Callable
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionLocal
+from ..models import Survey
+from ..utils.cache import survey_cache
+from ..utils.metrics import WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_ROWS
+
+logger = structlog.get_logger(__name__)
+
+ROW_COLUMNS = (
+    "id",
+    "description",
+    "description_hash",
+    "model_name",
+    "survey_json",
+    "schema_version",
+)
+
+InsertRows = Callable[[AsyncSession, list[dict]], Awaitable[None]]
+
+
+class WriteBehindQueue:
+    """Persist newly generated surveys in the background, in batches.
+
+    ``submit`` keeps a transient ``Survey`` in a bounded in-memory queue keyed
+    by description hash, so the caller can answer without waiting for the
+    insert. A flusher task started lazily on the running loop writes the queue
+    every ``flush_interval`` seconds (or as soon as a full batch is waiting)
+    with ``insert``, an ``ON CONFLICT DO NOTHING`` bulk insert. Surveys leave
+    the queue only once their batch is committed, so a brief is always found
+    either here or in the database. If another writer stored the brief first,
+    its row (same id, since ids derive from the hash) replaces the queued
+    payload in the caches. ``drain`` writes whatever is left on shutdown.
+    """
+
+    def __init__(
+        self,
+        insert: InsertRows,
+        max_pending: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        enabled: bool = False,
+    ) -> None:
+        self.insert = insert
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self._pending: OrderedDict[str, Survey] = OrderedDict()
+        self._by_id: dict[str, str] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def get(self, description_hash: str) -> Survey | None:
+        return self._pending.get(description_hash)
+
+    def get_by_id(self, survey_id: object) -> Survey | None:
+        description_hash = self._by_id.get(str(survey_id))
+        return self._pending.get(description_hash) if description_hash else None
+
+    def submit(self, survey: Survey) -> bool:
+        """Queue a survey for writing; False when the queue is full."""
+        if len(self._pending) >= self.max_pending:
+            WRITE_BEHIND_ROWS.inc(outcome="rejected")
+            return False
+        self.start()
+        self._pending[survey.description_hash] = survey
+        self._by_id[str(survey.id)] = survey.description_hash
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def flush(self) -> int:
+        """Write everything queued so far; return the number of rows flushed."""
+        if self._lock is None:
+            return 0
+        flushed = 0
+        async with self._lock:
+            while self._pending:
+                batch = list(islice(self._pending.values(), self.batch_size))
+                await self._write(batch)
+                for survey in batch:
+                    if self._pending.get(survey.description_hash) is survey:
+                        del self._pending[survey.description_hash]
+                    self._by_id.pop(str(survey.id), None)
+                flushed += len(batch)
+        return flushed
+
+    async def drain(self) -> int:
+        """Stop the flusher and write the remaining queue (graceful shutdown)."""
+        task, self._task = self._task, None
+        # A task left on an earlier, closed loop is simply dropped.
+        if task is not None and self._loop is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._pending and self._loop is not asyncio.get_running_loop():
+            # Queued on another (finished) loop: start fresh on this one.
+            self._lock = asyncio.Lock()
+        flushed = await self.flush()
+        self._loop = None
+        return flushed
+
+    async def _write(self, batch: list[Survey]) -> None:
+        start = time.perf_counter()
+        rows = [{column: getattr(s, column) for column in ROW_COLUMNS} for s in batch]
+        async with self.session_factory() as session:
+            await self.insert(session, rows)
+            ids = [row["id"] for row in rows]
+            stored = dict(
+                (
+                    await session.execute(
+                        select(Survey.id, Survey.survey_json).where(Survey.id.in_(ids))
+                    )
+                ).all()
+            )
+            await session.commit()
+        WRITE_BEHIND_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        lost = [s for s in batch if stored.get(s.id, s.survey_json) != s.survey_json]
+        WRITE_BEHIND_ROWS.inc(len(rows) - len(lost), outcome="written")
+        if lost:
+            # Another process stored the same brief first; its row wins.
+            WRITE_BEHIND_ROWS.inc(len(lost), outcome="conflict")
+            for survey in lost:
+                await survey_cache.invalidate(survey.id, survey.description_hash)
+                survey_cache.put(survey.id, survey.description_hash, stored[survey.id])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Keep the queue and retry on the next tick.
+                logger.exception("write_behind_flush_failed", pending=self.depth())
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict
+
+import orjson
+import structlog
+
+from ..config import Settings, get_settings, subscribe
+from .compression import precompress
+from .metrics import CACHE_LOOKUPS
+from .state import StateBackend, StateBackendError, state_backend
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    survey_id: str
+    description_hash: str
+    payload: dict
+    body: bytes
+    etag: str
+    expires_at: float | None
+    # Precompressed bodies by content coding, built on the entry's first read.
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    compressed: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(b) for b in self.encoded.values())
+
+
+def make_etag(body: bytes) -> str:
+    """Strong validator for a serialized payload."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class SurveyCache:
+    """Bounded in-process LRU cache of validated survey payloads.
+
+    Entries are indexed by survey id and by description hash and keep the
+    serialized JSON body and its ETag next to the payload; precompressed
+    encodings (bodies of at least ``compress_min_size`` bytes) are added by
+    ``encodings`` when a retained entry is first read. Eviction is
+    triggered by entry count or total body bytes, whichever is hit first; an
+    optional TTL expires entries lazily on access.
+
+    With a ``shared`` state backend, entries are also published there (body
+    keyed by survey id, id keyed by description hash) so every worker can fill
+    its local cache from what another one already built. The ``fetch*``
+    methods fall back to the shared store on a local miss; the synchronous
+    ``get*`` methods only look locally.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float | None = None,
+        compress_min_size: int = 500,
+        shared: StateBackend | None = None,
+        shared_ttl: float | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._publishing: set[asyncio.Task] = set()
+        self.compress_min_size = compress_min_size
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._by_hash: Dict[str, str] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def get(self, survey_id: object) -> dict | None:
+        entry = self.entry(survey_id)
+        return entry.payload if entry is not None else None
+
+    def get_by_hash(self, description_hash: str) -> dict | None:
+        entry = self.entry_by_hash(description_hash)
+        return entry.payload if entry is not None else None
+
+    def entry(self, survey_id: object) -> CacheEntry | None:
+        return self._lookup(str(survey_id))
+
+    def entry_by_hash(self, description_hash: str) -> CacheEntry | None:
+        survey_id = self._by_hash.get(description_hash)
+        if survey_id is None:
+            self.misses += 1
+            return None
+        return self._lookup(survey_id)
+
+    async def fetch_entry(self, survey_id: object) -> CacheEntry | None:
+        key = str(survey_id)
+        entry = self._lookup(key)
+        if entry is None and self.shared is not None:
+            entry = await self._fetch_shared(key)
+        return entry
+
+    async def fetch(self, survey_id: object) -> dict | None:
+        entry = await self.fetch_entry(survey_id)
+        return entry.payload if entry is not None else None
+
+    async def fetch_by_hash(self, description_hash: str) -> dict | None:
+        entry = await self.fetch_entry_by_hash(description_hash)
+        return entry.payload if entry is not None else None
+
+    async def fetch_entry_by_hash(self, description_hash: str) -> CacheEntry | None:
+        entry = self.entry_by_hash(description_hash)
+        if entry is not None or self.shared is None:
+            return entry
+        try:
+            survey_id = await self.shared.get(f"survey-hash:{description_hash}")
+        except StateBackendError as exc:
+            logger.warning("cache_state_unavailable", error=str(exc))
+            return None
+        if survey_id is None:
+            CACHE_LOOKUPS.inc(layer="shared", result="miss")
+            return None
+        return await self._fetch_shared(survey_id.decode())
+
+    def put(
+        self, survey_id: object, description_hash: str, payload: dict
+    ) -> CacheEntry:
+        """Serialize and cache a payload (and publish it to the shared store).
+
+        The entry is returned even when it is too large to keep or caching is
+        disabled, so callers can always serve its body and ETag.
+        """
+        entry = self._store(str(survey_id), description_hash, payload)
+        if self.shared is not None:
+            task = asyncio.create_task(self._publish(entry))
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
+        return entry
+
+    async def flush(self) -> None:
+        """Wait for pending writes to the shared store."""
+        if self._publishing:
+            await asyncio.gather(*self._publishing)
+
+    def _store(
+        self,
+        key: str,
+        description_hash: str,
+        payload: dict,
+        body: bytes | None = None,
+    ) -> CacheEntry:
+        body = orjson.dumps(payload) if body is None else body
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        entry = CacheEntry(
+            key, description_hash, payload, body, make_etag(body), expires_at
+        )
+        if self.max_entries <= 0 or entry.size > self.max_bytes:
+            return entry
+        self._discard(key)
+        self._entries[key] = entry
+        self._by_hash[description_hash] = key
+        self.bytes += entry.size
+        self._evict()
+        return entry
+
+    async def encodings(self, entry: CacheEntry) -> Dict[str, bytes]:
+        """Precompressed bodies of an entry, built once on its first read.
+
+        Only entries the cache keeps are compressed (at maximum levels, so in
+        a worker thread); others are served uncompressed here.
+        """
+        if entry.compressed or self._entries.get(entry.survey_id) is not entry:
+            return entry.encoded
+        entry.compressed = True
+        encoded = await asyncio.to_thread(
+            precompress, entry.body, self.compress_min_size
+        )
+        if self._entries.get(entry.survey_id) is entry:
+            entry.encoded = encoded
+            self.bytes += sum(len(b) for b in encoded.values())
+            self._evict()
+        return encoded
+
+    async def invalidate(self, survey_id: object, description_hash: str) -> None:
+        """Forget a survey (e.g. a deleted row) locally and in the shared store."""
+        key = str(survey_id)
+        self._discard(key)
+        if self._by_hash.get(description_hash) is not None:
+            self._discard(self._by_hash[description_hash])
+        if self.shared is None:
+            return
+        try:
+            await self.shared.delete(f"survey:{key}", f"survey-hash:{description_hash}")
+        except StateBackendError as exc:
+            logger.warning("cache_state_unavailable", error=str(exc))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_hash.clear()
+        self.bytes = 0
+
+    def _lookup(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self._discard(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    async def _fetch_shared(self, key: str) -> CacheEntry | None:
+        try:
+            value = await self.shared.get(f"survey:{key}")
+        except StateBackendError as exc:
+            logger.warning("cache_state_unavailable", error=str(exc))
+            return None
+        CACHE_LOOKUPS.inc(layer="shared", result="miss" if value is None else "hit")
+        if value is None:
+            return None
+        description_hash, _, body = value.partition(b"\n")
+        return self._store(key, description_hash.decode(), orjson.loads(body), body)
+
+    async def _publish(self, entry: CacheEntry) -> None:
+        value = entry.description_hash.encode() + b"\n" + entry.body
+        try:
+            await self.shared.set(f"survey:{entry.survey_id}", value, self.shared_ttl)
+            await self.shared.set(
+                f"survey-hash:{entry.description_hash}",
+                entry.survey_id.encode(),
+                self.shared_ttl,
+            )
+        except StateBackendError as exc:
+            logger.warning("cache_state_unavailable", error=str(exc))
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        if self._by_hash.get(entry.description_hash) == key:
+            del self._by_hash[entry.description_hash]
+
+
+settings = get_settings()
+survey_cache = SurveyCache(
+    max_entries=settings.survey_cache_max_entries,
+    max_bytes=settings.survey_cache_max_bytes,
+    ttl_seconds=settings.survey_cache_ttl_seconds,
+    compress_min_size=settings.compression_minimum_size,
+    shared=state_backend,
+    shared_ttl=settings.state_cache_ttl_seconds,
+)
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    # Tighter limits take effect as entries are added or read.
+    survey_cache.max_entries = new.survey_cache_max_entries
+    survey_cache.max_bytes = new.survey_cache_max_bytes
+    survey_cache.ttl_seconds = new.survey_cache_ttl_seconds
+    survey_cache.compress_min_size = new.compression_minimum_size
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import gzip
+from typing import Callable, Dict, Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # optional encoders
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Streaming media types are never buffered for compression.
+SKIP_MEDIA_TYPES = ("application/x-ndjson", "text/event-stream")
+
+Encoder = Callable[[bytes, bool], bytes]
+
+
+def _gzip(data: bytes, static: bool) -> bytes:
+    return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+
+
+def _brotli(data: bytes, static: bool) -> bytes:
+    return brotli.compress(data, quality=11 if static else 5)
+
+
+def _zstd(data: bytes, static: bool) -> bytes:
+    return zstandard.ZstdCompressor(level=19 if static else 3).compress(data)
+
+
+# Server preference order; only encoders whose library is installed.
+ENCODERS: Dict[str, Encoder] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+ENCODERS["gzip"] = _gzip
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress with ``encoding``; ``static`` trades CPU for size (done once)."""
+    return ENCODERS[encoding](data, static)
+
+
+def precompress(data: bytes, minimum_size: int) -> Dict[str, bytes]:
+    """All available encodings of a body that is stored and served repeatedly."""
+    if len(data) < minimum_size:
+        return {}
+    return {encoding: compress(data, encoding, static=True) for encoding in ENCODERS}
+
+
+def negotiate(accept_encoding: str | None, available: Iterable[str]) -> str | None:
+    """Pick the preferred available encoding the client accepts, if any."""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in available:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def etag_for_encoding(etag: str, encoding: str | None) -> str:
+    """Distinct strong ETag per content coding of the same payload."""
+    if not encoding:
+        return etag
+    return etag[:-1] + f"-{encoding}" + '"'
+
+
+def etag_without_encoding(etag: str) -> str:
+    """Undo ``etag_for_encoding``: the ETag of the uncompressed payload."""
+    for encoding in ("zstd", "br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+class CompressionMiddleware:
+    """Negotiated response compression (zstd, br, gzip) above a minimum size.
+
+    Only complete, uncompressed bodies are compressed; streamed responses,
+    NDJSON/SSE and responses that already set ``Content-Encoding`` (e.g.
+    precompressed survey reads) pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), ENCODERS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").split(";")[0]
+                passthrough = (
+                    "content-encoding" in headers or media_type in SKIP_MEDIA_TYPES
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if start is None:
+                # Later chunks of a streamed body.
+                await send(message)
+                return
+            head, start = start, None
+            if message.get("more_body") or len(body) < self.minimum_size:
+                await send(head)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = MutableHeaders(raw=head["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = etag_for_encoding(etag, encoding)
+            await send(head)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -8,6 +8,10 @@ def normalize_description(description: str) -> str:
     return " ".join(description.strip().lower().split())
 
 
-def hash_description(description: str) -> str:
-    normalized = normalize_description(description)
+def hash_normalized(normalized: str) -> str:
+    """SHA-256 hex digest of an already normalized description."""
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def hash_description(description: str) -> str:
+    return hash_normalized(normalize_description(description))
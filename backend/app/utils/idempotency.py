@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from .hashing import hash_description, normalize_description
+from .hashing import hash_normalized, normalize_description
 
 
 def compute_hash(description: str) -> tuple[str, str]:
-    """Return normalized description and its hash."""
+    """Return normalized description and its hash (normalizing only once)."""
     normalized = normalize_description(description)
-    return normalized, hash_description(description)
+    return normalized, hash_normalized(normalized)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Value(_Metric):
+    """Metric holding one value per label set.
+
+    ``collect`` may supply extra samples read from other components at scrape
+    time (e.g. pool or cache statistics), keyed by label values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Callable[[], Dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+        self._values: Dict[LabelValues, float] = {}
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        values = dict(self._values)
+        if self._collect is not None:
+            values.update(self._collect())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in sorted(values.items())
+        ]
+
+
+class Counter(_Value):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Value):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for key in sorted(self._counts):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), self._counts[key]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(names, key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames=(), collect=None
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, collect))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames=(), collect=None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames=()) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "survey_stage_duration_seconds",
+    "Time spent in each stage of survey generation and retrieval.",
+    ("stage",),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route", "status"),
+)
+STREAM_FIRST_QUESTION_SECONDS = REGISTRY.histogram(
+    "survey_stream_first_question_seconds",
+    "Time from a streamed generation request to its first question event.",
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "survey_cache_lookups_total",
+    "Survey lookups by cache layer (l1, shared, near, db) and result (hit, miss).",
+    ("layer", "result"),
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total",
+    "Provider generate calls by provider and outcome.",
+    ("provider", "outcome"),
+)
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total", "Provider calls retried after a failure.", ("provider",)
+)
+LLM_REJECTIONS = REGISTRY.counter(
+    "llm_rejections_total",
+    "Provider calls refused by the bulkhead or circuit breaker, by reason.",
+    ("reason",),
+)
+LLM_HEDGES = REGISTRY.counter(
+    "llm_hedged_requests_total",
+    "Hedged requests sent to a second backend, and how many of them won.",
+    ("outcome",),
+)
+WRITE_BEHIND_FLUSH_SECONDS = REGISTRY.histogram(
+    "survey_write_behind_flush_seconds",
+    "Time to insert and commit one write-behind batch.",
+)
+WRITE_BEHIND_ROWS = REGISTRY.counter(
+    "survey_write_behind_rows_total",
+    "Write-behind surveys written, lost to a concurrent writer (conflict) or "
+    "refused by a full queue (rejected).",
+    ("outcome",),
+)
+SURVEY_ACCESS_UPDATES = REGISTRY.counter(
+    "survey_access_updates_total",
+    "Survey reads recorded as last_accessed_at updates (written) or dropped "
+    "because too many were pending.",
+    ("outcome",),
+)
+
+# Per-request stage timings, reported in the Server-Timing response header.
+_request_timings: ContextVar[List[Tuple[str, float]] | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    totals: Dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={s * 1000:.2f}" for name, s in totals.items())
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into the stage histogram and the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from ..config import get_settings
+
+# Words that carry no meaning for matching briefs ("survey for a cafe").
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our the their "
+    "to with about".split()
+)
+
+_PRIME = (1 << 61) - 1
+
+
+def shingles(normalized: str, size: int = 1) -> frozenset[str]:
+    """Token shingles of a normalized description, ignoring stopwords."""
+    tokens = [t for t in re.findall(r"[a-z0-9]+", normalized) if t not in STOPWORDS]
+    if size <= 1:
+        return frozenset(tokens)
+    if len(tokens) <= size:
+        return frozenset([" ".join(tokens)]) if tokens else frozenset()
+    return frozenset(
+        " ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)
+    )
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of normalized briefs, keyed by description hash.
+
+    Candidates sharing at least one LSH band with the query are re-scored with
+    the exact Jaccard similarity of their shingle sets, so the threshold is
+    applied precisely; LSH only prunes the search. Everything is local and
+    in-process.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        shingle_size: int = 1,
+        num_perm: int = 64,
+        bands: int = 16,
+        enabled: bool = True,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.enabled = enabled
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+        self._buckets: List[Dict[tuple, Set[str]]] = [
+            defaultdict(set) for _ in range(bands)
+        ]
+        self._entries: Dict[str, tuple[frozenset[str], list[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, description_hash: object) -> bool:
+        return description_hash in self._entries
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for bucket in self._buckets:
+            bucket.clear()
+
+    def add(self, description_hash: str, normalized: str) -> None:
+        if description_hash in self._entries:
+            return
+        sh = shingles(normalized, self.shingle_size)
+        if not sh:
+            # Only stopwords: nothing to match on.
+            return
+        signature = self._signature(sh)
+        self._entries[description_hash] = (sh, signature)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band][key].add(description_hash)
+
+    def remove(self, description_hash: str) -> None:
+        entry = self._entries.pop(description_hash, None)
+        if entry is None:
+            return
+        for band, key in enumerate(self._band_keys(entry[1])):
+            members = self._buckets[band].get(key)
+            if members is not None:
+                members.discard(description_hash)
+                if not members:
+                    del self._buckets[band][key]
+
+    def query(self, normalized: str) -> tuple[str, float] | None:
+        """Return (description_hash, similarity) of the best match, if any."""
+        sh = shingles(normalized, self.shingle_size)
+        if not sh:
+            return None
+        signature = self._signature(sh)
+        candidates: Set[str] = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best: tuple[str, float] | None = None
+        for candidate in candidates:
+            similarity = jaccard(sh, self._entries[candidate][0])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def _signature(self, sh: frozenset[str]) -> list[int]:
+        values = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest())
+            for s in sh
+        ] or [0]
+        return [min((a * x + b) % _PRIME for x in values) for a, b in self._perms]
+
+    def _band_keys(self, signature: list[int]) -> list[tuple]:
+        r = self.rows
+        return [tuple(signature[i : i + r]) for i in range(0, len(signature), r)]
+
+
+settings = get_settings()
+near_duplicate_index = NearDuplicateIndex(
+    threshold=settings.near_duplicate_threshold,
+    shingle_size=settings.near_duplicate_shingle_size,
+    enabled=settings.near_duplicate_enabled,
+)
@@ -1,42 +1,141 @@
 import asyncio
 import time
-from typing import Dict, List
+from typing import Dict
 
+import structlog
 from fastapi import HTTPException, Request
 
-from ..config import get_settings
+from ..config import Settings, get_settings, subscribe
+from .state import StateBackend, StateBackendError, state_backend
+
+logger = structlog.get_logger(__name__)
+
+
+class _Window:
+    """Request counts for the current and previous fixed window of one key."""
+
+    __slots__ = ("index", "previous", "current")
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.previous = 0
+        self.current = 0
 
 
 class RateLimiter:
-    def __init__(self, rate: int, per_seconds: int):
+    """Sliding-window counter rate limiter.
+
+    Each key keeps two counters (current and previous fixed window) and the
+    request rate is estimated by weighting the previous window by how much of
+    it still overlaps the sliding window. Checks are O(1) in time and memory
+    per key and never await, so no lock is needed on the event loop. Keys idle
+    for more than a full window are dropped by ``sweep``.
+
+    With a ``shared`` state backend the two counters of each key live in the
+    shared store instead, so every worker enforces the same limit; if the
+    store is unreachable the worker falls back to its local counters.
+    """
+
+    def __init__(self, rate: int, per_seconds: int, shared: StateBackend | None = None):
         self.rate = rate
         self.per = per_seconds
-        self.hits: Dict[str, List[float]] = {}
-        self.lock = asyncio.Lock()
+        self.shared = shared
+        self.hits: Dict[str, _Window] = {}
+        self._sweeper: asyncio.Task | None = None
+
+    async def check(self, key: str, cost: int = 1):
+        """Count ``cost`` requests for ``key``, or raise 429 (counting none)."""
+        if self.shared is None:
+            self.hit(key, cost=cost)
+            return
+        try:
+            await self.shared_hit(key, cost=cost)
+        except StateBackendError as exc:
+            logger.warning("rate_limit_state_unavailable", error=str(exc))
+            self.hit(key, cost=cost)
+
+    async def shared_hit(
+        self, key: str, now: float | None = None, cost: int = 1
+    ) -> None:
+        # Wall-clock windows so all processes agree on the window index.
+        now = time.time() if now is None else now
+        index, offset = divmod(now, self.per)
+        index = int(index)
+        current_key = f"ratelimit:{key}:{index}"
+        current = await self.shared.incr(current_key, cost, ttl=2 * self.per)
+        previous = int(await self.shared.get(f"ratelimit:{key}:{index - 1}") or 0)
+        overlap = 1 - offset / self.per
+        if previous * overlap + current - 1 >= self.rate:
+            # Rejected requests do not count towards the limit.
+            await self.shared.incr(current_key, -cost, ttl=2 * self.per)
+            raise HTTPException(status_code=429, detail="Too many requests")
+
+    def configure(self, rate: int) -> None:
+        """Apply a new limit; counters restart when it changes."""
+        if rate != self.rate:
+            self.rate = rate
+            self.hits.clear()
 
-    async def check(self, key: str):
-        now = time.time()
-        async with self.lock:
-            window = [t for t in self.hits.get(key, []) if now - t < self.per]
-            if len(window) >= self.rate:
-                raise HTTPException(status_code=429, detail="Too many requests")
-            window.append(now)
-            self.hits[key] = window
+    def hit(self, key: str, now: float | None = None, cost: int = 1) -> None:
+        now = time.monotonic() if now is None else now
+        index, offset = divmod(now, self.per)
+        index = int(index)
+
+        window = self.hits.get(key)
+        if window is None:
+            window = self.hits[key] = _Window(index)
+        elif window.index != index:
+            window.previous = window.current if window.index == index - 1 else 0
+            window.current = 0
+            window.index = index
+
+        overlap = 1 - offset / self.per
+        if window.previous * overlap + window.current + cost - 1 >= self.rate:
+            raise HTTPException(status_code=429, detail="Too many requests")
+        window.current += cost
+
+    def sweep(self, now: float | None = None) -> int:
+        """Drop keys whose counters no longer affect any decision."""
+        now = time.monotonic() if now is None else now
+        oldest_live = int(now // self.per) - 1
+        idle = [key for key, w in self.hits.items() if w.index < oldest_live]
+        for key in idle:
+            del self.hits[key]
+        return len(idle)
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.per)
+            self.sweep()
 
 
 settings = get_settings()
-rate_limiter = RateLimiter(rate=settings.rate_limit_per_min, per_seconds=60)
-_cached_rate: int | None = settings.rate_limit_per_min
+rate_limiter = RateLimiter(
+    rate=settings.rate_limit_per_min, per_seconds=60, shared=state_backend
+)
+
+
+@subscribe
+def _apply_settings(new: Settings) -> None:
+    rate_limiter.configure(new.rate_limit_per_min)
+
+
+def client_key(request: Request) -> str:
+    return request.client.host if request.client else "global"
 
 
 async def rate_limit_dep(request: Request):
-    # Sync limiter configuration with current settings and reset window if changed.
-    current_rate = get_settings().rate_limit_per_min
-    global _cached_rate
-    if _cached_rate != current_rate:
-        _cached_rate = current_rate
-        rate_limiter.rate = current_rate
-        rate_limiter.hits.clear()
-
-    ident = request.client.host if request.client else "global"
-    await rate_limiter.check(ident)
+    await rate_limiter.check(client_key(request))
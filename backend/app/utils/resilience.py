@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from .metrics import LLM_REJECTIONS
+
+
+class ProviderUnavailable(Exception):
+    """The provider cannot take this call now; retry after ``retry_after`` s."""
+
+    def __init__(self, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """Cap concurrent calls and bound the queue of callers waiting for a slot.
+
+    Callers beyond ``max_queue`` waiters are rejected immediately; queued
+    callers that do not get a slot within ``queue_timeout`` seconds are
+    rejected when their deadline passes.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_queue:
+                LLM_REJECTIONS.inc(reason="queue_full")
+                raise ProviderUnavailable(
+                    "LLM provider is saturated", retry_after=self.queue_timeout
+                )
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                LLM_REJECTIONS.inc(reason="queue_timeout")
+                raise ProviderUnavailable(
+                    "Timed out waiting for the LLM provider",
+                    retry_after=self.queue_timeout,
+                ) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for ``cooldown`` seconds.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected without being attempted. Once the cooldown elapses a
+    single probe call is let through (half-open); its success closes the
+    circuit and its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.cooldown - now
+            if remaining > 0:
+                LLM_REJECTIONS.inc(reason="circuit_open")
+                raise ProviderUnavailable(
+                    "LLM provider circuit is open", retry_after=remaining
+                )
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            LLM_REJECTIONS.inc(reason="circuit_open")
+            raise ProviderUnavailable(
+                "LLM provider circuit is half-open", retry_after=1.0
+            )
+        self._probing = True
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Check the circuit, then record the outcome of the guarded call.
+
+        Rejections by an inner bulkhead and cancellations are not provider
+        failures; they only give up a half-open probe slot.
+        """
+        self.before_call()
+        try:
+            yield
+        except ProviderUnavailable:
+            self._probing = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self._probing = False
+            raise
+        self.record_success()
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
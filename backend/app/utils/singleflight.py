@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key (the leader) runs the work inline; callers that
+    arrive while it is in flight await the leader's result instead of repeating
+    the work. Errors are propagated to every waiter. If the leader is cancelled
+    the waiters are released and one of them takes over as the new leader.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.handoffs = 0
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": self.in_flight(),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "handoffs": self.handoffs,
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run ``fn`` once per key; return (result, shared).
+
+        ``shared`` is True when the result was produced by another caller.
+        """
+        while True:
+            fut = self._flights.get(key)
+            if fut is None:
+                return await self._lead(key, fn), False
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(fut), True
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                leader_gone = fut.cancelled() and not (task and task.cancelling())
+                if not leader_gone:
+                    raise
+                # The leader was cancelled before finishing; retry as a new leader.
+                self.handoffs += 1
+
+    async def do_many(
+        self,
+        keys: Iterable[Hashable],
+        fn: Callable[[list[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, tuple[Any, bool]]:
+        """Batch counterpart of ``do``; return {key: (result, shared)}.
+
+        Keys already in flight are awaited; the others are led together by one
+        ``fn(keys)`` call, which returns a result for every key it was given.
+        A result that is an exception fails that key's waiters and is returned
+        (not raised) here, as is an error shared from another leader.
+        """
+        results: Dict[Hashable, tuple[Any, bool]] = {}
+        remaining = list(dict.fromkeys(keys))
+        loop = asyncio.get_running_loop()
+        while remaining:
+            led: Dict[Hashable, asyncio.Future] = {}
+            shared: Dict[Hashable, asyncio.Future] = {}
+            for key in remaining:
+                fut = self._flights.get(key)
+                if fut is None:
+                    led[key] = self._flights[key] = loop.create_future()
+                    self.leaders += 1
+                else:
+                    shared[key] = fut
+                    self.coalesced += 1
+            try:
+                outcomes = await fn(list(led)) if led else {}
+            except asyncio.CancelledError:
+                for fut in led.values():
+                    fut.cancel()
+                raise
+            except BaseException as exc:
+                for fut in led.values():
+                    self._fail(fut, exc)
+                raise
+            else:
+                for key, fut in led.items():
+                    outcome = outcomes[key]
+                    if isinstance(outcome, BaseException):
+                        self._fail(fut, outcome)
+                    else:
+                        fut.set_result(outcome)
+                    results[key] = (outcome, False)
+            finally:
+                for key, fut in led.items():
+                    if self._flights.get(key) is fut:
+                        del self._flights[key]
+
+            remaining = []
+            for key, fut in shared.items():
+                try:
+                    results[key] = (await asyncio.shield(fut), True)
+                except asyncio.CancelledError:
+                    task = asyncio.current_task()
+                    if not (fut.cancelled() and not (task and task.cancelling())):
+                        raise
+                    # That leader was cancelled; lead the key in the next round.
+                    self.handoffs += 1
+                    remaining.append(key)
+                except Exception as exc:
+                    results[key] = (exc, True)
+        return results
+
+    def _fail(self, fut: asyncio.Future, exc: BaseException) -> None:
+        self.errors += 1
+        fut.set_exception(exc)
+        # Mark retrieved so an unobserved failure does not log a warning.
+        fut.exception()
+
+    async def _lead(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._flights[key] = fut
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            self._fail(fut, exc)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is fut:
+                del self._flights[key]
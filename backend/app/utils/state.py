@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Protocol
+from urllib.parse import unquote, urlsplit
+
+from ..config import Settings, get_settings
+
+
+class StateBackendError(Exception):
+    """The shared state store could not be reached or rejected a command."""
+
+
+class StateBackend(Protocol):
+    """Key/value store shared by all workers (rate-limit counters, cache bodies).
+
+    ``ttl`` is in seconds; ``incr`` sets it only when it creates the key.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None: ...
+
+    async def incr(
+        self, key: str, amount: int = 1, ttl: float | None = None
+    ) -> int: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+
+class MmapStore:
+    """Host-local store in a memory-mapped file shared by all worker processes.
+
+    The file is a fixed table of ``slots`` slots of ``value_size`` bytes each,
+    addressed by a hash of the key with a short linear probe. Every operation
+    holds an ``flock`` on the file, so workers never see torn writes; the lock
+    is polled without blocking the event loop and ``StateBackendError`` is
+    raised if it cannot be taken within ``lock_timeout`` seconds. When a probe
+    window is full the entry closest to expiry is overwritten, but a live
+    counter is never evicted to make room for a ``set`` value (a cache body
+    must not reset a client's rate limit). Values larger than a slot are not
+    stored: this is a cache, not a database. The file is opened lazily so each
+    forked worker maps it itself.
+    """
+
+    # Key digest, expires_at (0: never), length, flags.
+    _HEADER = struct.Struct("<16sdIB")
+    HEADER_SIZE = 32
+    _EMPTY = bytes(16)
+    _COUNTER = 1
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = 4096,
+        value_size: int = 16384,
+        probe: int = 8,
+        prefix: str = "",
+        lock_timeout: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.slots = slots
+        self.value_size = value_size
+        self.probe = min(probe, slots)
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.stride = self.HEADER_SIZE + value_size
+        self._fd: int | None = None
+        self._map: mmap.mmap | None = None
+        self._pid: int | None = None
+
+    async def get(self, key: str) -> bytes | None:
+        digest = self._digest(key)
+        async with self._locked() as table:
+            index, found = self._find(table, digest, time.time())
+            if not found:
+                return None
+            offset = index * self.stride
+            _, _, length, _ = self._HEADER.unpack_from(table, offset)
+            start = offset + self.HEADER_SIZE
+            return bytes(table[start : start + length])
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        if len(value) > self.value_size:
+            return
+        digest = self._digest(key)
+        now = time.time()
+        async with self._locked() as table:
+            index, _ = self._find(table, digest, now, evict_counters=False)
+            if index is not None:
+                self._write(table, index, digest, now + ttl if ttl else 0.0, value)
+
+    async def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        digest = self._digest(key)
+        now = time.time()
+        async with self._locked() as table:
+            index, found = self._find(table, digest, now)
+            offset = index * self.stride
+            if found:
+                _, expires_at, length, _ = self._HEADER.unpack_from(table, offset)
+                start = offset + self.HEADER_SIZE
+                value = int(table[start : start + length])
+            else:
+                expires_at, value = (now + ttl if ttl else 0.0), 0
+            value += amount
+            # Decimal text, like Redis, so ``get`` reads counters the same way.
+            self._write(table, index, digest, expires_at, b"%d" % value, self._COUNTER)
+            return value
+
+    async def delete(self, *keys: str) -> None:
+        now = time.time()
+        async with self._locked() as table:
+            for key in keys:
+                index, found = self._find(table, self._digest(key), now)
+                if found:
+                    self._HEADER.pack_into(
+                        table, index * self.stride, self._EMPTY, 0.0, 0, 0
+                    )
+
+    async def aclose(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+        self._map = self._fd = self._pid = None
+
+    def _digest(self, key: str) -> bytes:
+        return hashlib.blake2b((self.prefix + key).encode(), digest_size=16).digest()
+
+    def _open(self) -> mmap.mmap:
+        if self._map is None or self._pid != os.getpid():
+            size = self.slots * self.stride
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+        return self._map
+
+    @asynccontextmanager
+    async def _locked(self) -> AsyncIterator[mmap.mmap]:
+        # A blocking flock would stall the whole event loop while another
+        # worker holds the lock; poll it instead (critical sections are short).
+        table = self._open()
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.0005
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise StateBackendError("state file lock timed out") from None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.01)
+        try:
+            yield table
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(
+        self,
+        table: mmap.mmap,
+        digest: bytes,
+        now: float,
+        evict_counters: bool = True,
+    ) -> tuple[int | None, bool]:
+        """Slot holding ``digest`` (found) or the slot to store it in.
+
+        Returns ``(None, False)`` when the probe window is full of live
+        counters and ``evict_counters`` is false.
+        """
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        free: int | None = None
+        victim, victim_expiry = None, float("inf")
+        for step in range(self.probe):
+            index = (start + step) % self.slots
+            slot_digest, expires_at, _, flags = self._HEADER.unpack_from(
+                table, index * self.stride
+            )
+            expired = bool(expires_at) and expires_at <= now
+            if slot_digest == digest and not expired:
+                return index, True
+            if slot_digest == self._EMPTY or expired:
+                if free is None:
+                    free = index
+            elif flags & self._COUNTER and not evict_counters:
+                continue
+            elif victim is None or (expires_at and expires_at < victim_expiry):
+                victim, victim_expiry = index, expires_at or float("inf")
+        return (free if free is not None else victim), False
+
+    def _write(
+        self,
+        table: mmap.mmap,
+        index: int,
+        digest: bytes,
+        expires_at: float,
+        value: bytes,
+        flags: int = 0,
+    ) -> None:
+        offset = index * self.stride
+        start = offset + self.HEADER_SIZE
+        table[start : start + len(value)] = value
+        self._HEADER.pack_into(table, offset, digest, expires_at, len(value), flags)
+
+
+class RedisStore:
+    """Minimal asyncio client for a Redis-protocol (RESP2) server.
+
+    Only the commands the state backend needs are used (``GET``, ``SET``,
+    ``INCRBY``, ``DEL``). Connections are opened on demand and up to ``max_idle`` are
+    kept for reuse; a connection that fails mid-command is discarded.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "",
+        timeout: float = 1.0,
+        max_idle: int = 8,
+    ) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def get(self, key: str) -> bytes | None:
+        (value,) = await self.execute(("GET", self.prefix + key))
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        command: tuple = ("SET", self.prefix + key, value)
+        if ttl:
+            command += ("PX", int(ttl * 1000))
+        await self.execute(command)
+
+    async def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        key = self.prefix + key
+        if not ttl:
+            (value,) = await self.execute(("INCRBY", key, amount))
+            return value
+        # One round trip: create the key with its TTL if missing, then add.
+        _, value = await self.execute(
+            ("SET", key, 0, "PX", int(ttl * 1000), "NX"), ("INCRBY", key, amount)
+        )
+        return value
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.execute(("DEL", *(self.prefix + key for key in keys)))
+
+    async def execute(self, *commands: tuple) -> list:
+        """Send pipelined commands and return their replies in order."""
+        try:
+            reader, writer = await self._acquire()
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise StateBackendError(f"cannot connect to state store: {exc}") from exc
+        try:
+            writer.write(b"".join(_encode(command) for command in commands))
+            await asyncio.wait_for(writer.drain(), self.timeout)
+            replies = [
+                await asyncio.wait_for(_read_reply(reader), self.timeout)
+                for _ in commands
+            ]
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+            writer.close()
+            raise StateBackendError(f"state store command failed: {exc}") from exc
+        self._release(reader, writer)
+        for reply in replies:
+            if isinstance(reply, StateBackendError):
+                raise reply
+        return replies
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def _acquire(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing():
+                return reader, writer
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            writer.write(b"".join(_encode(command) for command in setup))
+            for _ in setup:
+                reply = await asyncio.wait_for(_read_reply(reader), self.timeout)
+                if isinstance(reply, StateBackendError):
+                    writer.close()
+                    raise OSError(str(reply))
+        return reader, writer
+
+    def _release(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        if len(self._idle) < self.max_idle:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+
+def _encode(command: tuple) -> bytes:
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    """Read one RESP2 reply; error replies are returned as exceptions."""
+    line = (await reader.readuntil(b"\r\n"))[:-2]
+    kind, rest = line[:1], line[1:]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return StateBackendError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        count = int(rest)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise StateBackendError(f"unexpected reply: {line!r}")
+
+
+def build_state_backend(settings: Settings) -> StateBackend | None:
+    """Shared store for ``STATE_BACKEND``; ``None`` keeps state in-process."""
+    backend = settings.state_backend.lower()
+    if backend == "mmap":
+        return MmapStore(
+            settings.state_mmap_path,
+            slots=settings.state_mmap_slots,
+            value_size=settings.state_mmap_value_size,
+            prefix=settings.state_key_prefix,
+        )
+    if backend == "redis":
+        return RedisStore(settings.state_redis_url, prefix=settings.state_key_prefix)
+    return None
+
+
+state_backend = build_state_backend(get_settings())
+
+
+async def close_state_backend() -> None:
+    if state_backend is not None:
+        await state_backend.aclose()
@@ -0,0 +1,267 @@
+"""Load and latency benchmark for the survey API.
+
+Drives ``create_app()`` in-process through an ASGI transport (default) or a
+running server (``--url``), sweeping concurrency levels for each scenario and
+recording throughput and p50/p95/p99 latency. Run from ``backend/``::
+
+    python benchmarks/bench_api.py --latency-ms 200 --jitter-ms 50 \\
+        --output bench_api.json
+    python benchmarks/bench_api.py --url http://localhost:8000 --output remote.json
+    python benchmarks/bench_api.py --compare main.json --output branch.json
+
+Against a running server, simulate provider latency with ``MOCK_LATENCY_MS`` /
+``MOCK_JITTER_MS`` and set ``RATE_LIMIT_PER_MIN`` high for all scenarios except
+``rate_limited`` (the in-process mode adjusts the limiter itself).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import httpx
+
+# In-memory SQLite shares one connection across sessions, which breaks under
+# concurrency; default to a throwaway file database instead.
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ("cache_hit", "cache_miss", "get_by_id", "rate_limited")
+GENERATE = "/api/surveys/generate"
+
+RequestFn = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = pct / 100 * (len(sorted_values) - 1)
+    lo = int(rank)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (rank - lo)
+
+
+async def run_level(
+    client: httpx.AsyncClient, request: RequestFn, concurrency: int, total: int
+) -> dict:
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    counter = itertools.count()
+
+    async def worker() -> None:
+        while (i := next(counter)) < total:
+            start = time.perf_counter()
+            resp = await request(client, i)
+            latencies.append(time.perf_counter() - start)
+            statuses[resp.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+class InProcessTarget:
+    """The app built by ``create_app()`` on a fresh database (``DATABASE_URL``)."""
+
+    def __init__(self, latency: float, jitter: float) -> None:
+        from app.db import Base, engine
+        from app.llm.providers import MockProvider
+        from app.main import create_app
+        from app.routers.surveys import get_provider
+
+        self.engine = engine
+        self.metadata = Base.metadata
+        self.app = create_app()
+        # create_app() enables INFO logging; per-request client logs skew timings.
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        provider = MockProvider(latency=latency, jitter=jitter)
+        self.app.dependency_overrides[get_provider] = lambda: provider
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(self.metadata.create_all)
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app), base_url="http://bench"
+        )
+        return self.client
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.client.aclose()
+        await self.engine.dispose()
+
+    def set_rate_limit(self, rate: int) -> None:
+        from app.utils.rate_limit import rate_limiter
+
+        rate_limiter.rate = rate
+        rate_limiter.hits.clear()
+
+
+class RemoteTarget:
+    def __init__(self, url: str, token: str | None) -> None:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.client = httpx.AsyncClient(
+            base_url=url,
+            headers=headers,
+            timeout=60,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        )
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        return self.client
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.client.aclose()
+
+    def set_rate_limit(self, rate: int) -> None:
+        """Rate limits of a remote server are configured by its environment."""
+
+
+async def run_scenario(
+    target, client: httpx.AsyncClient, scenario: str, levels: list[int], total: int
+) -> list[dict]:
+    tag = uuid.uuid4().hex[:8]
+    hot = {"description": f"benchmark hot brief {tag}"}
+    target.set_rate_limit(1 if scenario == "rate_limited" else 10**9)
+
+    if scenario in ("cache_hit", "get_by_id"):
+        warm = await client.post(GENERATE, json=hot)
+        warm.raise_for_status()
+        survey_id = warm.json()["id"]
+
+    results = []
+    for level in levels:
+        if scenario == "cache_hit":
+
+            async def request(c: httpx.AsyncClient, i: int) -> httpx.Response:
+                return await c.post(GENERATE, json=hot)
+
+        elif scenario == "cache_miss":
+
+            async def request(c: httpx.AsyncClient, i: int) -> httpx.Response:
+                brief = f"benchmark miss {tag} c{level} #{i}"
+                return await c.post(GENERATE, json={"description": brief})
+
+        elif scenario == "get_by_id":
+
+            async def request(c: httpx.AsyncClient, i: int) -> httpx.Response:
+                return await c.get(f"/api/surveys/{survey_id}")
+
+        else:
+
+            async def request(c: httpx.AsyncClient, i: int) -> httpx.Response:
+                return await c.post(GENERATE, json=hot)
+
+        result = await run_level(client, request, level, total)
+        result["scenario"] = scenario
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+    return results
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print per-scenario/concurrency deltas against a previous results file."""
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    for r in current["results"]:
+        b = before.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        print(
+            f"{r['scenario']:>13} c={r['concurrency']:<4} "
+            f"rps {b['throughput_rps']:>9} -> {r['throughput_rps']:<9} "
+            f"p95 {b['p95_ms']:>8}ms -> {r['p95_ms']}ms"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    if args.url:
+        target = RemoteTarget(args.url, args.token)
+    else:
+        target = InProcessTarget(args.latency_ms / 1000, args.jitter_ms / 1000)
+
+    results: list[dict] = []
+    async with target as client:
+        for scenario in args.scenarios:
+            results += await run_scenario(
+                target, client, scenario, args.concurrency, args.requests
+            )
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": "remote" if args.url else "in-process",
+            "url": args.url,
+            "mock_latency_ms": args.latency_ms,
+            "mock_jitter_ms": args.jitter_ms,
+            "requests_per_level": args.requests,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--token", help="API token for a remote server")
+    parser.add_argument(
+        "--scenarios",
+        type=lambda v: v.split(","),
+        default=list(SCENARIOS),
+        help=f"comma-separated subset of {','.join(SCENARIOS)}",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(x) for x in v.split(",")],
+        default=[1, 8, 32, 64],
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(json.load(fh), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Microbenchmark: sliding-window counter vs. the previous timestamp-list limiter.
+
+Run from ``backend/``::
+
+    python benchmarks/bench_rate_limit.py --requests 200000 --keys 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException  # noqa: E402
+
+from app.utils.rate_limit import RateLimiter  # noqa: E402
+
+
+class LegacyRateLimiter:
+    """The timestamp-list limiter with a global lock this module replaced."""
+
+    def __init__(self, rate: int, per_seconds: int):
+        self.rate = rate
+        self.per = per_seconds
+        self.hits: Dict[str, List[float]] = {}
+        self.lock = asyncio.Lock()
+
+    async def check(self, key: str):
+        now = time.time()
+        async with self.lock:
+            window = [t for t in self.hits.get(key, []) if now - t < self.per]
+            if len(window) >= self.rate:
+                raise HTTPException(status_code=429, detail="Too many requests")
+            window.append(now)
+            self.hits[key] = window
+
+
+async def run(limiter, requests: int, keys: int) -> dict:
+    rejected = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(requests):
+        k = i % keys
+        try:
+            await limiter.check(f"10.0.{k // 256}.{k % 256}")
+        except HTTPException:
+            rejected += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "impl": type(limiter).__name__,
+        "ops_per_sec": round(requests / elapsed),
+        "us_per_check": round(elapsed / requests * 1e6, 3),
+        "rejected": rejected,
+        "keys": len(limiter.hits),
+        "peak_mem_kib": round(peak / 1024),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=1_000)
+    parser.add_argument("--rate", type=int, default=100)
+    args = parser.parse_args()
+
+    for cls in (LegacyRateLimiter, RateLimiter):
+        limiter = cls(rate=args.rate, per_seconds=60)
+        print(asyncio.run(run(limiter, args.requests, args.keys)))
+
+
+if __name__ == "__main__":
+    main()
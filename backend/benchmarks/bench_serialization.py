@@ -0,0 +1,77 @@
+"""Microbenchmark: CPU time to validate and serialize one survey response.
+
+Compares the previous path (``model_validate``/``model_dump`` in the provider,
+then FastAPI's ``response_model`` validation and the stdlib JSON encoder) with
+single-pass validation through the cached ``TypeAdapter`` and ``ORJSONResponse``,
+for a cache miss (validate + serialize) and a cache hit (serialize only).
+Run from ``backend/``::
+
+    python benchmarks/bench_serialization.py --iterations 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Awaitable, Callable
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.llm.providers import MockProvider  # noqa: E402
+from app.schemas import Survey, validate_survey  # noqa: E402
+
+RESPONSE_FIELD = create_response_field(name="Response_generate", type_=Survey)
+
+
+async def legacy_response(raw: dict, validate: bool) -> bytes:
+    data = Survey.model_validate(raw).model_dump(mode="json") if validate else raw
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=data)
+    return JSONResponse(content).body
+
+
+async def single_pass_response(raw: dict, validate: bool) -> bytes:
+    data = validate_survey(raw) if validate else raw
+    return ORJSONResponse(data).body
+
+
+async def cpu_per_call(
+    fn: Callable[[dict, bool], Awaitable[bytes]],
+    raw: dict,
+    validate: bool,
+    iterations: int,
+) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        await fn(raw, validate)
+    return (time.process_time() - start) / iterations
+
+
+async def main_async(iterations: int) -> None:
+    raw = await MockProvider().generate("Customer satisfaction survey for a cafe")
+    print(f"{'path':<12} {'legacy_us':>10} {'single_us':>10} {'saved_us':>9} {'x':>6}")
+    for label, validate in (("cache_miss", True), ("cache_hit", False)):
+        legacy = await cpu_per_call(legacy_response, raw, validate, iterations)
+        single = await cpu_per_call(single_pass_response, raw, validate, iterations)
+        print(
+            f"{label:<12} {legacy * 1e6:>10.1f} {single * 1e6:>10.1f} "
+            f"{(legacy - single) * 1e6:>9.1f} {legacy / single:>5.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
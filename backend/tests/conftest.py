@@ -15,13 +15,32 @@ from sqlalchemy.ext.asyncio import (  # noqa: E402
     create_async_engine,
 )
 
-from app.db import Base, get_session  # noqa: E402
+from app.config import reload_settings  # noqa: E402
+from app.db import Base, get_session, get_session_factory  # noqa: E402
+from app.utils.cache import survey_cache  # noqa: E402
+from app.utils.rate_limit import rate_limiter  # noqa: E402
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_process_state():
+    # The L1 cache and rate limiter are process-wide; each test starts with a
+    # fresh database, so start with empty caches and windows too.
+    survey_cache.clear()
+    rate_limiter.hits.clear()
+    yield
+    survey_cache.clear()
+    # Tests that change the environment reload settings; restore the snapshot
+    # (monkeypatch has already undone its changes by now).
+    reload_settings()
 
 
 @pytest_asyncio.fixture
-async def client() -> AsyncClient:
+async def app():
     import app.routers.surveys as surveys_module  # noqa: E402
     from app.main import create_app  # noqa: E402
+    from app.services.access import access_tracker  # noqa: E402
+    from app.services.jobs import job_queue  # noqa: E402
+    from app.services.survey_service import write_behind  # noqa: E402
 
     surveys_module._request_count = 0
 
@@ -37,8 +56,20 @@ async def client() -> AsyncClient:
             yield session
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+    job_queue.session_factory = TestingSessionLocal
+    write_behind.session_factory = TestingSessionLocal
+    access_tracker.session_factory = TestingSessionLocal
 
-    async with AsyncClient(app=app, base_url="http://test") as ac:
-        yield ac
+    yield app
 
+    await job_queue.stop()
+    await write_behind.drain()
+    await access_tracker.stop()
     await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(app) -> AsyncClient:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
@@ -1,14 +1,18 @@
 import pytest
+from fastapi import HTTPException
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.config import get_settings, reload_settings
 from app.db import Base, get_session
 from app.llm.providers import MockProvider
+from app.utils.rate_limit import RateLimiter
 
 
 async def _build_client(monkeypatch, **env):
     for k, v in env.items():
         monkeypatch.setenv(k, v)
+    reload_settings()
     import importlib
 
     import app.routers.surveys as surveys_module
@@ -66,3 +70,67 @@ async def test_mock_provider_is_deterministic():
     s1 = await provider.generate("alpha")
     s2 = await provider.generate("alpha")
     assert s1 == s2
+
+
+def test_sliding_window_weights_previous_window_and_evicts_idle_keys():
+    limiter = RateLimiter(rate=2, per_seconds=60)
+    limiter.hit("a", now=10)
+    limiter.hit("a", now=20)
+    with pytest.raises(HTTPException):
+        limiter.hit("a", now=30)
+    # 15s into the next window 75% of the previous two hits still count.
+    limiter.hit("a", now=75)
+    with pytest.raises(HTTPException):
+        limiter.hit("a", now=80)
+    limiter.hit("a", now=100)
+
+    limiter.hit("b", now=100)
+    assert limiter.sweep(now=230) == 2
+    assert limiter.hits == {}
+
+
+@pytest.mark.asyncio
+async def test_settings_are_cached_until_reloaded(monkeypatch, client):
+    from app.utils.cache import survey_cache
+    from app.utils.rate_limit import rate_limiter
+
+    monkeypatch.setenv("ADMIN_TOKEN", "admin-secret")
+    reload_settings()
+    admin = {"Authorization": "Bearer admin-secret"}
+    before = get_settings()
+    monkeypatch.setenv("RATE_LIMIT_PER_MIN", "1")
+    monkeypatch.setenv("SURVEY_CACHE_MAX_ENTRIES", "7")
+    assert get_settings() is before
+    assert rate_limiter.rate == before.rate_limit_per_min
+
+    resp = await client.post("/admin/reload-settings", headers=admin)
+    assert resp.status_code == 200
+    assert get_settings().rate_limit_per_min == 1
+    assert rate_limiter.rate == 1
+    assert survey_cache.max_entries == 7
+    r = await client.post("/api/surveys/generate", json={"description": "first brief"})
+    assert r.status_code == 201
+    r = await client.post("/api/surveys/generate", json={"description": "second brief"})
+    assert r.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_need_a_configured_admin_token(monkeypatch, client):
+    assert (await client.post("/admin/reload-settings")).status_code == 404
+
+    monkeypatch.setenv("ADMIN_TOKEN", "admin-secret")
+    reload_settings()
+    wrong = {"Authorization": "Bearer nope"}
+    assert (
+        await client.post("/admin/reload-settings", headers=wrong)
+    ).status_code == 403
+
+    monkeypatch.setenv("RATE_LIMIT_PER_MIN", "hunter2-not-a-number")
+    resp = await client.post(
+        "/admin/reload-settings", headers={"Authorization": "Bearer admin-secret"}
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == [
+        {"loc": ["rate_limit_per_min"], "msg": resp.json()["detail"][0]["msg"]}
+    ]
+    assert "hunter2" not in resp.text
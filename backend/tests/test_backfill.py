@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.cli.backfill import backfill
+from app.db import Base
+from app.models import Survey
+from app.schemas import SURVEY_SCHEMA_VERSION
+
+
+@pytest.mark.asyncio
+async def test_backfill_normalizes_legacy_rows_once():
+    engine = create_async_engine(os.environ["DATABASE_URL"], future=True)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with session_factory() as session:
+        session.add(
+            Survey(
+                description="legacy brief",
+                description_hash="0" * 64,
+                model_name="mock-v1",
+                survey_json={"title": "Old", "questions": [{"question": "Why?"}]},
+            )
+        )
+        await session.commit()
+
+    assert await backfill(session_factory, batch_size=1) == {"updated": 1, "failed": 0}
+    assert await backfill(session_factory) == {"updated": 0, "failed": 0}
+
+    async with session_factory() as session:
+        survey = (await session.execute(Survey.__table__.select())).one()
+        assert survey.schema_version == SURVEY_SCHEMA_VERSION
+        assert survey.survey_json["questions"][0]["type"] == "open_text"
+        assert survey.survey_json["questions"][0]["text"] == "Why?"
+        assert survey.survey_json["id"] == str(survey.id)
+    await engine.dispose()
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.llm.providers import MockProvider
+from app.services.survey_service import new_survey, write_behind
+from app.utils.hashing import hash_description
+
+
+class FlakyProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+
+    async def generate(self, description: str) -> dict:
+        self.calls.append(description)
+        if "fail" in description:
+            raise RuntimeError("provider exploded")
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_batch_generate_dedupes_and_reports_per_item_status(app, client):
+    import app.routers.surveys as surveys_module
+
+    provider = FlakyProvider()
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    existing = await client.post(
+        "/api/surveys/generate", json={"description": "already generated"}
+    )
+    resp = await client.post(
+        "/api/surveys/generate:batch",
+        json={
+            "descriptions": [
+                "brand new brief",
+                "Brand  new brief",
+                "already generated",
+                "this one should fail",
+            ]
+        },
+    )
+
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert [i["status"] for i in items] == ["created", "cached", "cached", "error"]
+    assert [i["cache_hit"] for i in items] == [False, True, True, False]
+    assert items[0]["survey"]["id"] == items[1]["survey"]["id"]
+    assert items[2]["survey"]["id"] == existing.json()["id"]
+    assert items[3]["error"] == "generation failed"
+    assert sorted(provider.calls) == sorted(
+        ["already generated", "brand new brief", "this one should fail"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_is_charged_per_uncached_brief(client, monkeypatch):
+    from app.utils.rate_limit import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "rate", 3)
+    monkeypatch.setattr(rate_limiter, "shared", None)
+    briefs = [f"rate limited brief {n}" for n in range(4)]
+
+    resp = await client.post(
+        "/api/surveys/generate:batch", json={"descriptions": briefs}
+    )
+    assert resp.status_code == 429
+
+    ok = await client.post(
+        "/api/surveys/generate:batch", json={"descriptions": briefs[:2] * 2}
+    )
+    assert ok.status_code == 200
+    # 1 unit for the rejected request + 2 for the two distinct briefs = limit.
+    assert (
+        await client.post("/api/surveys/generate:batch", json={"descriptions": briefs})
+    ).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_batch_of_stored_briefs_is_not_charged_beyond_the_request(
+    client, monkeypatch
+):
+    from app.utils.rate_limit import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "rate", 3)
+    monkeypatch.setattr(rate_limiter, "shared", None)
+    briefs = [f"stored brief {n}" for n in range(10)]
+    async with write_behind.session_factory() as session:
+        for brief in briefs:
+            survey_json = await MockProvider().generate(brief)
+            session.add(
+                new_survey(brief, hash_description(brief), "mock-v1", survey_json)
+            )
+        await session.commit()
+
+    resp = await client.post(
+        "/api/surveys/generate:batch", json={"descriptions": briefs}
+    )
+
+    assert resp.status_code == 200
+    assert [i["status"] for i in resp.json()["items"]] == ["cached"] * len(briefs)
+
+
+class SlowProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+
+    async def generate(self, description: str) -> dict:
+        self.calls.append(description)
+        await asyncio.sleep(0.05)
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_batch_and_single_generation_share_a_flight(app, client):
+    import app.routers.surveys as surveys_module
+
+    provider = SlowProvider()
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    single, batch = await asyncio.gather(
+        client.post("/api/surveys/generate", json={"description": "shared brief"}),
+        client.post(
+            "/api/surveys/generate:batch",
+            json={"descriptions": ["shared brief", "other brief"]},
+        ),
+    )
+
+    assert sorted(provider.calls) == ["other brief", "shared brief"]
+    items = batch.json()["items"]
+    assert items[0]["survey"]["id"] == single.json()["id"]
+    # Exactly one of the two requests generated the shared brief.
+    assert (single.status_code == 201) + (not items[0]["cache_hit"]) == 1
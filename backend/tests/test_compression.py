@@ -0,0 +1,80 @@
+import gzip
+
+import pytest
+
+from app.utils.cache import SurveyCache, survey_cache
+from app.utils.compression import negotiate
+
+
+def test_negotiate_respects_q_values_and_server_preference():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("br;q=0, gzip;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("*;q=0", ["gzip"]) is None
+    assert negotiate(None, ["gzip"]) is None
+
+
+@pytest.mark.asyncio
+async def test_survey_responses_are_compressed_but_streams_are_not(client):
+    created = await client.post(
+        "/api/surveys/generate",
+        json={"description": "Conference attendee feedback"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert created.headers["Content-Encoding"] == "gzip"
+    survey_id = created.json()["id"]
+    entry = survey_cache.entry(survey_id)
+    # Compressed lazily, on the first read of the cached entry.
+    assert entry.encoded == {}
+
+    url = f"/api/surveys/{survey_id}"
+    compressed = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert set(entry.encoded) >= {"gzip"}
+    assert survey_cache.bytes == entry.size
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert compressed.headers["ETag"] == entry.etag[:-1] + '-gzip"'
+    assert gzip.decompress(entry.encoded["gzip"]) == entry.body
+    assert compressed.json() == created.json()
+
+    plain = await client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.content == entry.body
+
+    stream = await client.post(
+        "/api/surveys/generate:stream",
+        json={"description": "Conference attendee feedback"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert "Content-Encoding" not in stream.headers
+
+
+@pytest.mark.asyncio
+async def test_entries_the_cache_does_not_keep_are_never_compressed():
+    body = {"title": "x" * 2000, "questions": []}
+    disabled = SurveyCache(max_entries=0, compress_min_size=10)
+    entry = disabled.put("a", "hash-a", body)
+    assert await disabled.encodings(entry) == {}
+
+    cache = SurveyCache(compress_min_size=10)
+    kept = cache.put("b", "hash-b", body)
+    assert kept.encoded == {}
+    assert set(await cache.encodings(kept)) >= {"gzip"}
+
+
+@pytest.mark.asyncio
+async def test_etag_rewritten_by_the_middleware_still_answers_304(client, monkeypatch):
+    monkeypatch.setattr(survey_cache, "max_entries", 0)
+    created = await client.post(
+        "/api/surveys/generate", json={"description": "Uncached festival feedback"}
+    )
+    url = f"/api/surveys/{created.json()['id']}"
+    gzip_headers = {"Accept-Encoding": "gzip"}
+
+    first = await client.get(url, headers=gzip_headers)
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["ETag"].endswith('-gzip"')
+
+    again = await client.get(
+        url, headers={**gzip_headers, "If-None-Match": first.headers["ETag"]}
+    )
+    assert again.status_code == 304
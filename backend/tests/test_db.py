@@ -0,0 +1,138 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.db as db
+from app.config import Settings
+from app.models import Survey, uuid_key
+from app.schemas import SURVEY_SCHEMA_VERSION
+from app.services.jobs import job_queue
+from app.utils import hashing, idempotency
+
+
+def test_engine_options_apply_pool_settings_outside_sqlite():
+    settings = Settings(
+        database_url="postgresql+psycopg://db/surveys",
+        db_pool_size=12,
+        db_max_overflow=3,
+        db_statement_cache_size=50,
+    )
+    options = db.engine_options(settings.database_url, settings)
+    assert options["pool_size"] == 12 and options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is True
+    assert options["query_cache_size"] == 50
+    assert db.engine_options("sqlite+aiosqlite:///:memory:", settings) == {
+        "query_cache_size": 50
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_reads_from_replica(client, monkeypatch):
+    replica = create_async_engine(os.environ["DATABASE_URL"], future=True)
+    async with replica.begin() as conn:
+        await conn.run_sync(db.Base.metadata.create_all)
+    ReplicaSession = async_sessionmaker(replica, expire_on_commit=False)
+
+    survey_id = uuid.uuid4()
+    payload = {
+        "id": str(survey_id),
+        "title": "Replica only",
+        "description": "replicated brief",
+        "questions": [],
+        "createdAt": "2020-01-01T00:00:00",
+    }
+    async with ReplicaSession() as session:
+        session.add(
+            Survey(
+                id=uuid_key(survey_id),
+                description="replicated brief",
+                description_hash="f" * 64,
+                model_name="mock-v1",
+                survey_json=payload,
+                schema_version=SURVEY_SCHEMA_VERSION,
+            )
+        )
+        await session.commit()
+
+    monkeypatch.setattr(db, "ReadSessionLocal", ReplicaSession)
+    resp = await client.get(f"/api/surveys/{survey_id}")
+    await replica.dispose()
+
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Replica only"
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_falls_back_to_primary_while_replica_lags(client, monkeypatch):
+    replica = create_async_engine(os.environ["DATABASE_URL"], future=True)
+    async with replica.begin() as conn:
+        await conn.run_sync(db.Base.metadata.create_all)
+    survey_id = uuid.uuid4()
+    # Written to the primary only: the replica has not caught up yet.
+    async with job_queue.session_factory() as session:
+        session.add(
+            Survey(
+                id=uuid_key(survey_id),
+                description="lagging brief",
+                description_hash="e" * 64,
+                model_name="mock-v1",
+                survey_json={
+                    "id": str(survey_id),
+                    "title": "Primary only",
+                    "description": "lagging brief",
+                    "questions": [],
+                    "createdAt": "2020-01-01T00:00:00",
+                },
+                schema_version=SURVEY_SCHEMA_VERSION,
+            )
+        )
+        await session.commit()
+
+    monkeypatch.setattr(
+        db, "ReadSessionLocal", async_sessionmaker(replica, expire_on_commit=False)
+    )
+    resp = await client.get(f"/api/surveys/{survey_id}")
+    missing = await client.get(f"/api/surveys/{uuid.uuid4()}")
+    await replica.dispose()
+
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Primary only"
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_keys_are_stored_as_bytes_and_read_back_as_hex_and_uuid(
+    client, monkeypatch
+):
+    calls = []
+    original = hashing.normalize_description
+    monkeypatch.setattr(
+        idempotency,
+        "normalize_description",
+        lambda d: calls.append(d) or original(d),
+    )
+    normalized, description_hash = idempotency.compute_hash("  Binary  KEYS ")
+    assert len(calls) == 1
+    assert description_hash == hashing.hash_description(normalized)
+
+    created = await client.post(
+        "/api/surveys/generate", json={"description": "Binary keys"}
+    )
+    async with job_queue.session_factory() as session:
+        raw = (
+            await session.execute(
+                text("SELECT id, description_hash FROM surveys WHERE id = :id"),
+                {"id": uuid.UUID(created.json()["id"]).bytes},
+            )
+        ).one()
+        assert raw.description_hash == bytes.fromhex(description_hash)
+        survey = (
+            await session.execute(
+                select(Survey).where(Survey.description_hash == description_hash)
+            )
+        ).scalar_one()
+    assert survey.id == uuid.UUID(created.json()["id"])
+    assert survey.description_hash == description_hash
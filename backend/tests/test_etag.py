@@ -0,0 +1,31 @@
+import pytest
+
+from app.utils.cache import survey_cache
+
+
+@pytest.mark.asyncio
+async def test_get_survey_sends_etag_and_answers_conditional_requests(client):
+    created = await client.post(
+        "/api/surveys/generate", json={"description": "Library visitor feedback"}
+    )
+    url = f"/api/surveys/{created.json()['id']}"
+
+    first = await client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.json() == created.json()
+    assert etag.startswith('"') and etag.endswith('"')
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+    assert "immutable" in first.headers["Cache-Control"]
+
+    hits = survey_cache.hits
+    cached = await client.get(url, headers={"If-None-Match": f'W/"x", {etag}'})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert survey_cache.hits == hits + 1
+
+    survey_cache.clear()
+    from_db = await client.get(url, headers={"If-None-Match": etag})
+    assert from_db.status_code == 304
+
+    stale = await client.get(url, headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200 and stale.headers["ETag"] == etag
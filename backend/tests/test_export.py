@@ -0,0 +1,79 @@
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.cli.export import export
+from app.db import Base, get_session, get_session_factory
+from app.models import Survey
+
+BASE = datetime(2024, 1, 1)
+
+
+def _surveys() -> list[Survey]:
+    return [
+        Survey(
+            description=f"brief {n}",
+            description_hash=f"{n:064d}",
+            model_name="mock-v1",
+            survey_json={"title": f"Survey {n}", "questions": []},
+            created_at=BASE + timedelta(days=n),
+        )
+        for n in range(3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_ndjson_with_range_and_gzip(app, client):
+    async for session in app.dependency_overrides[get_session]():
+        session.add_all(_surveys())
+        await session.commit()
+
+    engine = app.dependency_overrides[get_session_factory]().kw["bind"]
+    checked_out: list[int] = []
+    event.listen(engine.sync_engine, "checkout", lambda *a: checked_out.append(1))
+    event.listen(engine.sync_engine, "checkin", lambda *a: checked_out.append(-1))
+
+    resp = await client.get("/api/surveys/export")
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["description"] for r in rows] == ["brief 0", "brief 1", "brief 2"]
+    assert rows[0]["survey_json"]["title"] == "Survey 0"
+
+    ranged = await client.get(
+        "/api/surveys/export",
+        params={
+            "created_from": (BASE + timedelta(days=1)).isoformat(),
+            "created_to": (BASE + timedelta(days=2)).isoformat(),
+            "gzip": "1",
+        },
+    )
+    assert ranged.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(ranged.content).splitlines()
+    assert [json.loads(line)["description"] for line in lines] == ["brief 1"]
+    # The streamed body's connection is returned once the stream ends.
+    assert checked_out and sum(checked_out) == 0
+
+
+@pytest.mark.asyncio
+async def test_export_cli_writes_compressed_ndjson():
+    engine = create_async_engine(os.environ["DATABASE_URL"], future=True)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        session.add_all(_surveys())
+        await session.commit()
+
+    output = io.BytesIO()
+    result = await export(output, session_factory, compress=True, batch_size=2)
+
+    lines = gzip.decompress(output.getvalue()).splitlines()
+    assert result == {"rows": 3, "bytes": len(output.getvalue())}
+    assert len(lines) == 3
+    await engine.dispose()
@@ -0,0 +1,146 @@
+import asyncio
+import random
+
+import pytest
+
+from app.config import Settings
+from app.llm.hedging import HedgedProvider
+from app.llm.providers import (
+    MockProvider,
+    OpenRouterProvider,
+    TogetherProvider,
+    _build_provider,
+)
+
+
+class Backend(MockProvider):
+    def __init__(self, name: str, latency: float = 0.0, fail: bool = False) -> None:
+        super().__init__(latency=latency)
+        self.model_name = name
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, description: str) -> dict:
+        self.calls += 1
+        try:
+            survey = await super().generate(description)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.model_name} down")
+        return survey
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_failures_fail_over():
+    slow, fast = Backend("slow", latency=1.0), Backend("fast")
+    # With no samples both are equally weighted; this seed picks ``slow`` first.
+    hedged = HedgedProvider(
+        [slow, fast], default_delay=0.02, min_delay=0.01, rng=random.Random(3)
+    )
+
+    survey, model_name = await hedged.generate_with_model("hedged brief")
+    await asyncio.sleep(0)
+
+    assert survey["title"] == "Hedged Brief Survey"
+    assert model_name == "fast"
+    assert (slow.cancelled, fast.calls) == (1, 1)
+    assert hedged.stats_for(fast).successes == 1
+
+    broken, ok = Backend("broken", fail=True), Backend("ok")
+    failover = HedgedProvider([broken, ok], rng=random.Random(3))
+    survey, model_name = await failover.generate_with_model("failover brief")
+    assert survey["title"]
+    assert model_name == "ok"
+    assert failover.stats_for(broken).errors == 1
+
+
+def test_routing_prefers_the_faster_backend():
+    slow, fast = Backend("slow"), Backend("fast")
+    hedged = HedgedProvider([slow, fast], rng=random.Random(0))
+    for _ in range(20):
+        hedged.stats_for(slow).record_success(2.0)
+        hedged.stats_for(fast).record_success(0.5)
+
+    primaries = [hedged.ordered()[0] for _ in range(1000)]
+
+    assert primaries.count(fast) > 700
+    assert hedged.hedge_delay(slow) == 2.0
+
+
+@pytest.mark.asyncio
+async def test_hedged_away_calls_still_count_as_slow():
+    slow, fast = Backend("slow", latency=1.0), Backend("fast")
+    hedged = HedgedProvider(
+        [slow, fast], default_delay=0.02, min_delay=0.01, rng=random.Random(3)
+    )
+    # Pin ``slow`` as the primary so it never answers before the hedge.
+    hedged.ordered = lambda: [slow, fast]
+
+    for i in range(5):
+        _, model_name = await hedged.generate_with_model(f"brief {i}")
+        await asyncio.sleep(0)
+        assert model_name == "fast"
+
+    stats = hedged.stats_for(slow)
+    assert (stats.successes, stats.cancelled) == (0, 5)
+    assert stats.percentile(0.5) >= 0.01
+    assert hedged._score(slow) > hedged._score(fast)
+
+
+@pytest.mark.asyncio
+async def test_hedged_setting_builds_openai_compatible_backends():
+    settings = Settings(
+        database_url="sqlite+aiosqlite:///:memory:",
+        llm_provider="hedged",
+        llm_hedge_providers=["openrouter", "together"],
+        openrouter_api_key="or-key",
+        together_api_key="tg-key",
+    )
+    provider = _build_provider("hedged", settings)
+
+    assert isinstance(provider, HedgedProvider)
+    assert [type(p) for p in provider.providers] == [
+        OpenRouterProvider,
+        TogetherProvider,
+    ]
+    assert provider.providers[1].url.startswith("https://api.together.xyz/")
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedged_set_skips_backends_without_credentials():
+    settings = Settings(
+        database_url="sqlite+aiosqlite:///:memory:",
+        llm_provider="hedged",
+        llm_hedge_providers=["openrouter", "together", "openai"],
+        openrouter_api_key="or-key",
+        together_api_key=None,
+        openai_api_key=None,
+    )
+    provider = _build_provider("hedged", settings)
+
+    # A single configured backend is used directly, never raced against a mock.
+    assert isinstance(provider, OpenRouterProvider)
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batch_rows_record_the_backend_that_answered(app, client):
+    import app.routers.surveys as surveys_module
+
+    hedged = HedgedProvider(
+        [Backend("broken", fail=True), Backend("ok")], rng=random.Random(3)
+    )
+    app.dependency_overrides[surveys_module.get_provider] = lambda: hedged
+
+    resp = await client.post(
+        "/api/surveys/generate:batch",
+        json={"descriptions": ["first hedged brief", "second hedged brief"]},
+    )
+    assert [i["status"] for i in resp.json()["items"]] == ["created", "created"]
+
+    listing = (await client.get("/api/surveys")).json()["items"]
+    assert [row["model_name"] for row in listing] == ["ok", "ok"]
@@ -1,5 +1,13 @@
+import uuid
+
 import pytest
 
+from app.models import Survey
+from app.schemas import SURVEY_SCHEMA_VERSION
+from app.services.jobs import job_queue
+from app.utils.cache import survey_cache
+from app.utils.hashing import hash_description
+
 
 @pytest.mark.asyncio
 async def test_generate_same_description_returns_cached_200(client):
@@ -12,3 +20,45 @@ async def test_generate_same_description_returns_cached_200(client):
     assert second.status_code == 200
     assert second.headers["X-Cache-Hit"] == "1"
     assert second.json()["id"] == survey_id
+
+
+@pytest.mark.asyncio
+async def test_generated_survey_can_be_fetched_by_returned_id(client):
+    created = await client.post(
+        "/api/surveys/generate", json={"description": "fetch me back"}
+    )
+    survey_id = created.json()["id"]
+    survey_cache.clear()  # exercise the database lookup
+
+    fetched = await client.get(f"/api/surveys/{survey_id}")
+    assert fetched.status_code == 200
+    assert fetched.json() == created.json()
+
+
+@pytest.mark.asyncio
+async def test_rows_stored_with_the_payload_id_are_served_with_the_row_id(client):
+    description = "stored before ids were stamped"
+    async with job_queue.session_factory() as session:
+        survey = Survey(
+            description=description,
+            description_hash=hash_description(description),
+            model_name="mock-v1",
+            survey_json={
+                "id": str(uuid.uuid4()),
+                "title": "Unstamped",
+                "description": description,
+                "questions": [],
+                "createdAt": "2020-01-01T00:00:00",
+            },
+            schema_version=SURVEY_SCHEMA_VERSION,
+        )
+        session.add(survey)
+        await session.commit()
+
+    fetched = await client.get(f"/api/surveys/{survey.id}")
+    assert fetched.status_code == 200
+    assert fetched.json()["id"] == str(survey.id)
+
+    hit = await client.post("/api/surveys/generate", json={"description": description})
+    assert hit.headers["X-Cache-Hit"] == "1"
+    assert hit.json()["id"] == str(survey.id)
@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.llm.providers import MockProvider
+from app.models import SurveyJob
+from app.services.jobs import JobQueue, job_queue
+from app.utils.hashing import hash_description
+
+
+class SlowProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+        self.release = asyncio.Event()
+
+    async def generate(self, description: str) -> dict:
+        self.calls.append(description)
+        await self.release.wait()
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_async_generate_returns_job_and_long_poll_gets_survey(app, client):
+    import app.routers.surveys as surveys_module
+
+    provider = SlowProvider()
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+    payload = {"description": "Employee engagement pulse"}
+
+    first = await client.post("/api/surveys/generate?async=1", json=payload)
+    second = await client.post(
+        "/api/surveys/generate?async=1",
+        json={"description": "employee  engagement pulse"},
+    )
+
+    assert first.status_code == 202
+    job = first.json()
+    assert job["status"] in ("queued", "running")
+    assert first.headers["Location"] == f"/api/surveys/jobs/{job['id']}"
+    assert second.json()["id"] == job["id"]
+
+    poll = await client.get(f"/api/surveys/jobs/{job['id']}")
+    assert poll.json()["status"] in ("queued", "running")
+
+    asyncio.get_running_loop().call_later(0.05, provider.release.set)
+    done = await client.get(f"/api/surveys/jobs/{job['id']}?wait=5")
+
+    body = done.json()
+    assert body["status"] == "succeeded"
+    assert body["survey"]["id"] == body["survey_id"]
+    assert provider.calls == ["Employee engagement pulse"]
+
+    sync = await client.post("/api/surveys/generate", json=payload)
+    assert sync.status_code == 200 and sync.json()["id"] == body["survey_id"]
+
+
+@pytest.mark.asyncio
+async def test_recovery_skips_live_jobs_and_each_job_is_claimed_once(app):
+    session_factory = job_queue.session_factory
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        jobs = {
+            name: SurveyJob(
+                description=name,
+                description_hash=hash_description(name),
+                status=status,
+                updated_at=now - timedelta(seconds=age),
+            )
+            for name, status, age in [
+                ("queued brief", "queued", 0),
+                ("lost brief", "running", 3600),
+                ("live brief", "running", 0),
+                ("shared brief", "queued", 0),
+            ]
+        }
+        session.add_all(jobs.values())
+        await session.commit()
+
+    provider = SlowProvider()
+    provider.release.set()
+    # Two API processes that both picked up the same queued job.
+    workers = [
+        JobQueue(2, 10, session_factory=session_factory, stale_after=600) for _ in "ab"
+    ]
+    shared_id = jobs["shared brief"].id
+    await asyncio.gather(*(w.run_job(shared_id, provider) for w in workers))
+    assert provider.calls == ["shared brief"]
+
+    assert await workers[0].recover(provider) == 2
+    await workers[0]._feeder
+    await workers[0]._queue.join()
+    await workers[0].stop()
+
+    assert sorted(provider.calls) == ["lost brief", "queued brief", "shared brief"]
+    async with session_factory() as session:
+        statuses = {
+            job.description: job.status
+            for job in (await session.execute(select(SurveyJob))).scalars()
+        }
+    assert statuses["live brief"] == "running"
+    assert {statuses[n] for n in ("queued brief", "lost brief", "shared brief")} == {
+        "succeeded"
+    }
+
+
+@pytest.mark.asyncio
+async def test_recovery_feeds_a_backlog_larger_than_the_queue(app):
+    session_factory = job_queue.session_factory
+    names = [f"backlog brief {n}" for n in range(5)]
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        session.add_all(
+            SurveyJob(
+                description=name,
+                description_hash=hash_description(name),
+                created_at=now - timedelta(minutes=len(names) - n),
+            )
+            for n, name in enumerate(names)
+        )
+        await session.commit()
+
+    provider = SlowProvider()
+    provider.release.set()
+    queue = JobQueue(1, 2, session_factory=session_factory)
+    assert await queue.recover(provider) == 5
+    await queue._feeder
+    await queue._queue.join()
+    await queue.stop()
+
+    assert sorted(provider.calls) == names
+    async with session_factory() as session:
+        statuses = (await session.execute(select(SurveyJob.status))).scalars()
+        assert set(statuses) == {"succeeded"}
+
+
+@pytest.mark.asyncio
+async def test_racing_submissions_for_a_brief_share_one_job(app, monkeypatch):
+    session_factory = job_queue.session_factory
+    description = "raced brief"
+    description_hash = hash_description(description)
+    async with session_factory() as session:
+        winner = SurveyJob(description=description, description_hash=description_hash)
+        session.add(winner)
+        await session.commit()
+
+    # The loser's lookup ran before the winner's insert committed.
+    find_job = job_queue._find_job
+    lookups = []
+
+    async def stale_find_job(session, description_hash):
+        lookups.append(description_hash)
+        if len(lookups) == 1:
+            return None
+        return await find_job(session, description_hash)
+
+    monkeypatch.setattr(job_queue, "_find_job", stale_find_job)
+    provider = SlowProvider()
+    async with session_factory() as session:
+        job = await job_queue.submit(session, description, description_hash, provider)
+
+    assert job.id == winner.id
+    assert len(lookups) == 2
+    assert job_queue.depth() == 0
+    async with session_factory() as session:
+        jobs = (await session.execute(select(SurveyJob))).scalars().all()
+        assert [j.id for j in jobs] == [winner.id]
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_session
+from app.models import Survey
+
+
+def _survey(n: int, model_name: str, types: list[str], created_at: datetime):
+    return Survey(
+        description=f"brief {n}",
+        description_hash=f"{n:064d}",
+        model_name=model_name,
+        survey_json={
+            "title": f"Survey {n}",
+            "questions": [{"type": t, "text": "?"} for t in types],
+        },
+        created_at=created_at,
+    )
+
+
+@pytest.mark.asyncio
+async def test_list_surveys_pages_by_cursor_and_filters(app, client):
+    base = datetime(2024, 1, 1)
+    async for session in app.dependency_overrides[get_session]():
+        session: AsyncSession
+        session.add_all(
+            [
+                _survey(1, "mock-v1", ["rating"], base),
+                # Same timestamp: the id breaks the tie.
+                _survey(2, "gpt-4o-mini", ["likert", "rating"], base),
+                _survey(3, "mock-v1", ["open_text"], base + timedelta(hours=1)),
+                _survey(4, "gpt-4o-mini", ["matrix"], base + timedelta(hours=2)),
+                _survey(5, "mock-v1", ["rating"], base + timedelta(hours=3)),
+            ]
+        )
+        await session.commit()
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/api/surveys", params=params)).json()
+        titles += [item["title"] for item in page["items"]]
+        assert set(page["items"][0]) == {
+            "id",
+            "title",
+            "description",
+            "model_name",
+            "created_at",
+        }
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert titles[:3] == ["Survey 5", "Survey 4", "Survey 3"]
+    assert sorted(titles[3:]) == ["Survey 1", "Survey 2"]
+
+    filtered = await client.get(
+        "/api/surveys", params={"model_name": "mock-v1", "question_type": "rating"}
+    )
+    assert [i["title"] for i in filtered.json()["items"]] == ["Survey 5", "Survey 1"]
+
+    bad = await client.get("/api/surveys", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
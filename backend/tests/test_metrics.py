@@ -0,0 +1,34 @@
+import pytest
+
+from app.utils.metrics import Histogram
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    hist = Histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0))
+    hist.observe(0.05, op="read")
+    hist.observe(0.1, op="read")
+    hist.observe(3, op="read")
+
+    lines = hist.render().splitlines()
+    assert lines[1] == "# TYPE op_seconds histogram"
+    assert 'op_seconds_bucket{op="read",le="0.1"} 2' in lines
+    assert 'op_seconds_bucket{op="read",le="1.0"} 2' in lines
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in lines
+    assert 'op_seconds_count{op="read"} 3' in lines
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_and_metrics_endpoint(client):
+    resp = await client.post(
+        "/api/surveys/generate", json={"description": "instrumented brief"}
+    )
+    stages = [part.split(";")[0] for part in resp.headers["Server-Timing"].split(", ")]
+    assert {"hash", "lookup", "provider", "commit", "total"} <= set(stages)
+
+    metrics = await client.get("/metrics")
+    assert metrics.status_code == 200
+    body = metrics.text
+    assert 'survey_stage_duration_seconds_count{stage="provider"}' in body
+    assert 'survey_cache_lookups_total{layer="db",result="miss"}' in body
+    assert 'llm_requests_total{provider="mock-v1",outcome="ok"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",' in body
@@ -0,0 +1,55 @@
+import io
+import os
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.cli.prewarm import prewarm, read_briefs
+from app.db import Base
+from app.llm.providers import MockProvider
+from app.models import Survey
+
+
+class CountingProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+
+    async def generate(self, description: str) -> dict:
+        self.calls.append(description)
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_prewarm_skips_stored_briefs_and_resumes():
+    engine = create_async_engine(os.environ["DATABASE_URL"], future=True)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    source = io.StringIO("Cafe feedback\n\nGym onboarding\ncafe  FEEDBACK\nhi\n")
+    provider = CountingProvider()
+    first = await prewarm(
+        read_briefs(source), session_factory, provider, batch_size=2, concurrency=2
+    )
+    assert {k: first[k] for k in ("read", "created", "existing", "invalid")} == {
+        "read": 4,
+        "created": 2,
+        "existing": 1,
+        "invalid": 1,
+    }
+
+    again = await prewarm(
+        ["Gym onboarding", "Retail checkout"], session_factory, provider
+    )
+    assert (again["created"], again["existing"]) == (1, 1)
+    assert sorted(provider.calls) == [
+        "Cafe feedback",
+        "Gym onboarding",
+        "Retail checkout",
+    ]
+
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count()).select_from(Survey)) == 3
+    await engine.dispose()
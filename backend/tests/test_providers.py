@@ -0,0 +1,66 @@
+import importlib.util
+import json
+
+import httpx
+import pytest
+from structlog.testing import capture_logs
+
+from app.config import Settings
+from app.llm.providers import (
+    MockProvider,
+    OpenAIProvider,
+    build_http_client,
+    close_llm_providers,
+    get_llm_provider,
+)
+
+
+@pytest.mark.asyncio
+async def test_openai_provider_reuses_shared_client():
+    mock = await MockProvider().generate("pooled client")
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["Authorization"])
+        content = json.dumps(mock)
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": content}}]}
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = OpenAIProvider("sk-test", client=client)
+    await provider.generate("pooled client")
+    survey = await provider.generate("pooled client")
+
+    assert survey["title"] == mock["title"]
+    assert seen == ["Bearer sk-test", "Bearer sk-test"]
+    assert not client.is_closed
+    await provider.aclose()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_http2_fallback_without_h2_is_logged(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with capture_logs() as logs:
+        client = build_http_client(Settings(llm_http2=True))
+        await client.aclose()
+        client = build_http_client(Settings(llm_http2=False))
+        await client.aclose()
+
+    assert [log["event"] for log in logs] == ["llm_http2_unavailable"]
+
+
+@pytest.mark.asyncio
+async def test_get_llm_provider_returns_shared_instance():
+    settings = Settings(
+        database_url="sqlite+aiosqlite:///:memory:",
+        llm_provider="openai",
+        openai_api_key="sk-test",
+    )
+    provider = get_llm_provider(settings)
+    assert get_llm_provider(settings) is provider
+    await close_llm_providers()
+    assert provider.client.is_closed
+    assert get_llm_provider(settings) is not provider
+    await close_llm_providers()
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.llm.providers import GuardedProvider, MockProvider
+from app.utils.cache import survey_cache
+from app.utils.resilience import Bulkhead, CircuitBreaker, ProviderUnavailable
+
+
+class CountingProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+
+    async def generate(self, description: str) -> dict:
+        self.calls.append(description)
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_queue_is_full_or_deadline_passes():
+    bulkhead = Bulkhead(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with bulkhead.slot():
+            await release.wait()
+
+    async def queued() -> None:
+        async with bulkhead.slot():
+            pass
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(queued())
+    await asyncio.sleep(0)
+
+    with pytest.raises(ProviderUnavailable):
+        await queued()  # queue already holds one waiter
+    with pytest.raises(ProviderUnavailable):
+        await waiter  # no slot before the deadline
+
+    release.set()
+    await holder
+    await queued()
+    assert bulkhead.active == 0 and bulkhead.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_returns_503_but_cached_briefs_still_served(app, client):
+    import app.routers.surveys as surveys_module
+
+    inner = CountingProvider()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=30)
+    provider = GuardedProvider(inner, Bulkhead(4, 4, 1.0), breaker)
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    first = await client.post(
+        "/api/surveys/generate", json={"description": "cafe feedback"}
+    )
+    assert first.status_code == 201
+
+    breaker.record_failure()
+    survey_cache.clear()
+
+    cached = await client.post(
+        "/api/surveys/generate", json={"description": "cafe feedback"}
+    )
+    assert cached.status_code == 200
+    assert cached.headers["X-Cache-Hit"] == "1"
+
+    resp = await client.post(
+        "/api/surveys/generate", json={"description": "gym onboarding"}
+    )
+    assert resp.status_code == 503
+    assert 1 <= int(resp.headers["Retry-After"]) <= 30
+    assert inner.calls == ["cafe feedback"]
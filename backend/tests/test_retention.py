@@ -0,0 +1,160 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import Base
+from app.llm.providers import MockProvider
+from app.models import Survey
+from app.services.access import access_tracker
+from app.services.retention import prune_surveys
+from app.utils.cache import survey_cache
+from app.utils.hashing import hash_description
+from app.utils.near_duplicate import near_duplicate_index
+
+
+@pytest.mark.asyncio
+async def test_reads_are_coalesced_into_one_last_accessed_update(client):
+    created = (
+        await client.post("/api/surveys/generate", json={"description": "Hotel stay"})
+    ).json()
+    async with access_tracker.session_factory() as session:
+        before = await session.get(Survey, created["id"])
+        updated_at = before.updated_at
+
+    for _ in range(3):
+        assert (await client.get(f"/api/surveys/{created['id']}")).status_code == 200
+    assert access_tracker.depth() == 1
+    assert await access_tracker.flush() == 1
+
+    async with access_tracker.session_factory() as session:
+        survey = await session.get(Survey, created["id"])
+        assert survey.last_accessed_at is not None
+        assert survey.updated_at == updated_at
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_touch_the_row_id_not_the_payload_id(client):
+    description = "Legacy hotel stay"
+    async with access_tracker.session_factory() as session:
+        legacy = Survey(
+            description=description,
+            description_hash=hash_description(description),
+            model_name="mock",
+            # Legacy payloads carry an id of their own.
+            survey_json={"id": str(uuid.uuid4()), "title": "Old", "questions": []},
+        )
+        session.add(legacy)
+        await session.commit()
+        await session.execute(
+            update(Survey).where(Survey.id == legacy.id).values(last_accessed_at=None)
+        )
+        await session.commit()
+    survey_cache.put(legacy.id, legacy.description_hash, legacy.survey_json)
+
+    resp = await client.post("/api/surveys/generate", json={"description": description})
+    assert resp.headers["X-Cache-Hit"] == "1"
+    assert await access_tracker.flush() == 1
+
+    async with access_tracker.session_factory() as session:
+        survey = await session.get(Survey, legacy.id)
+        assert survey.last_accessed_at is not None
+
+
+@pytest.mark.asyncio
+async def test_prune_removes_cold_rows_by_ttl_then_by_row_count():
+    engine = create_async_engine(os.environ["DATABASE_URL"], future=True)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    now = datetime.now(timezone.utc)
+    ages = {"stale": 40, "never-read": 1, "warm": 5, "hot": 0}
+    async with session_factory() as session:
+        for i, (name, days) in enumerate(ages.items()):
+            created_at = now - timedelta(days=60 - i)
+            session.add(
+                Survey(
+                    description=name,
+                    description_hash=hash_description(name),
+                    model_name="mock",
+                    survey_json={"title": name, "questions": []},
+                    created_at=created_at,
+                    last_accessed_at=now - timedelta(days=days),
+                )
+            )
+        # Rows from before the column existed fall back to created_at.
+        await session.execute(
+            update(Survey)
+            .where(Survey.description == "never-read")
+            .values(last_accessed_at=None)
+        )
+        await session.commit()
+
+    async with session_factory() as session:
+        stale = (
+            await session.execute(select(Survey).where(Survey.description == "stale"))
+        ).scalar_one()
+    survey_cache.put(stale.id, stale.description_hash, stale.survey_json)
+    near_duplicate_index.add(stale.description_hash, "stale")
+
+    archived: list[dict] = []
+
+    async def archive(rows: list[dict]) -> None:
+        archived.extend(rows)
+
+    result = await prune_surveys(
+        session_factory,
+        ttl_seconds=30 * 86400,
+        max_rows=1,
+        batch_size=1,
+        archive=archive,
+    )
+    assert result["rows_pruned"] == 3
+    assert result["bytes_reclaimed"] > 0
+    assert [row["description"] for row in archived] == [
+        "never-read",
+        "stale",
+        "warm",
+    ]
+    async with session_factory() as session:
+        remaining = (await session.execute(select(Survey.description))).scalars()
+        assert list(remaining) == ["hot"]
+    assert await survey_cache.fetch(stale.id) is None
+    assert stale.description_hash not in near_duplicate_index
+    await engine.dispose()
+
+
+class GatedProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def generate(self, description: str) -> dict:
+        await self.release.wait()
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_pruned_survey_is_generated_again_by_async_requests(app, client):
+    import app.routers.surveys as surveys_module
+
+    payload = {"description": "Conference attendee feedback"}
+    job_ids = []
+    for _ in range(2):
+        provider = GatedProvider()
+        app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+        job = (await client.post("/api/surveys/generate?async=1", json=payload)).json()
+        asyncio.get_running_loop().call_later(0.05, provider.release.set)
+        done = (await client.get(f"/api/surveys/jobs/{job['id']}?wait=5")).json()
+        assert done["status"] == "succeeded"
+        assert done["survey"]["id"] == done["survey_id"]
+        job_ids.append(job["id"])
+        result = await prune_surveys(access_tracker.session_factory, max_rows=0)
+        assert result["rows_pruned"] == 1
+
+    assert job_ids[0] != job_ids[1]
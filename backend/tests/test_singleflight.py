@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.llm.providers import MockProvider
+from app.utils.singleflight import SingleFlight
+
+
+class SlowCountingProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def generate(self, description: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return await super().generate(description)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_generate_calls_provider_once(app, client):
+    import app.routers.surveys as surveys_module
+
+    provider = SlowCountingProvider()
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    payload = {"description": "coalesced burst of briefs"}
+    responses = await asyncio.gather(
+        *(client.post("/api/surveys/generate", json=payload) for _ in range(5))
+    )
+
+    assert provider.calls == 1
+    assert sorted(r.status_code for r in responses) == [200, 200, 200, 200, 201]
+    assert {r.json()["id"] for r in responses} == {responses[0].json()["id"]}
+    hits = [r.headers["X-Cache-Hit"] for r in responses]
+    assert hits.count("0") == 1 and hits.count("1") == 4
+
+
+@pytest.mark.asyncio
+async def test_singleflight_propagates_errors_and_hands_off_on_cancel():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def boom():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    leader = asyncio.create_task(flights.do("k", boom))
+    await started.wait()
+    with pytest.raises(RuntimeError):
+        await flights.do("k", boom)
+    with pytest.raises(RuntimeError):
+        await leader
+    assert flights.stats()["errors"] == 1
+
+    started.clear()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flights.do("k", slow))
+    await started.wait()
+    waiter = asyncio.create_task(flights.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await waiter == ("done", False)
+    assert flights.stats()["handoffs"] == 1
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_do_many_leads_new_keys_together_and_awaits_keys_in_flight():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    batches: list[list[str]] = []
+
+    async def single():
+        started.set()
+        await asyncio.sleep(0.01)
+        return "single"
+
+    async def many(keys):
+        batches.append(keys)
+        return {k: RuntimeError(k) if k == "bad" else f"batch {k}" for k in keys}
+
+    leader = asyncio.create_task(flights.do("a", single))
+    await started.wait()
+    results = await flights.do_many(["a", "b", "bad", "b"], many)
+
+    assert batches == [["b", "bad"]]
+    assert results["a"] == ("single", True)
+    assert results["b"] == ("batch b", False)
+    outcome, shared = results["bad"]
+    assert isinstance(outcome, RuntimeError) and not shared
+    assert await leader == ("single", False)
+    assert flights.stats()["errors"] == 1
+    assert flights.in_flight() == 0
@@ -0,0 +1,169 @@
+import asyncio
+import fcntl
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.cache import SurveyCache
+from app.utils.rate_limit import RateLimiter
+from app.utils.state import (
+    MmapStore,
+    RedisStore,
+    StateBackendError,
+    _encode,
+    _read_reply,
+)
+
+
+async def _fake_redis_server():
+    """Local stand-in for Redis: GET, SET (PX/NX), INCRBY and DEL over RESP."""
+    data: dict[bytes, tuple[bytes, float | None]] = {}
+
+    def lookup(key):
+        value, expires_at = data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            data.pop(key, None)
+            return None
+        return value
+
+    def run(command):
+        name, args = command[0].upper(), command[1:]
+        if name == b"GET":
+            return lookup(args[0])
+        if name == b"SET":
+            key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+            if b"NX" in options and lookup(key) is not None:
+                return None
+            expires_at = None
+            if b"PX" in options:
+                ms = int(args[2 + options.index(b"PX") + 1])
+                expires_at = time.monotonic() + ms / 1000
+            data[key] = (value, expires_at)
+            return "OK"
+        if name == b"INCRBY":
+            value = int(lookup(args[0]) or 0) + int(args[1])
+            data[args[0]] = (b"%d" % value, data.get(args[0], (None, None))[1])
+            return value
+        if name == b"DEL":
+            return sum(data.pop(key, None) is not None for key in args)
+        return None
+
+    def reply(value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, str):
+            return b"+" + value.encode() + b"\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                command = await _read_reply(reader)
+                writer.write(reply(run(command)))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_mmap_store_is_shared_between_handles(tmp_path):
+    path = str(tmp_path / "state")
+    first, second = MmapStore(path, slots=64, value_size=128), MmapStore(path, 64, 128)
+
+    await first.set("a", b"payload")
+    assert await second.get("a") == b"payload"
+    assert await first.incr("n", 2, ttl=60) == 2
+    assert await second.incr("n", 1, ttl=60) == 3
+    assert await first.get("n") == b"3"
+    await first.delete("a", "missing")
+    assert await second.get("a") is None
+
+    await first.set("old", b"x", ttl=0.01)
+    await first.set("big", b"x" * 129)
+    await asyncio.sleep(0.02)
+    assert await second.get("old") is None
+    assert await second.get("big") is None
+    await first.aclose()
+    await second.aclose()
+
+
+@pytest.mark.asyncio
+async def test_mmap_counters_survive_cache_writes_and_the_lock_is_polled(tmp_path):
+    store = MmapStore(str(tmp_path / "state"), slots=8, value_size=64, probe=8)
+    assert await store.incr("ratelimit:1.2.3.4", ttl=120) == 1
+    for n in range(200):
+        await store.set(f"survey:{n}", b"body", ttl=86400)
+    assert await store.get("ratelimit:1.2.3.4") == b"1"
+
+    # Another worker holds the lock: wait without blocking the loop, then give up.
+    store.lock_timeout = 0.05
+    other = os.open(store.path, os.O_RDWR)
+    fcntl.flock(other, fcntl.LOCK_EX)
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        with pytest.raises(StateBackendError):
+            await store.get("ratelimit:1.2.3.4")
+    finally:
+        ticker.cancel()
+        os.close(other)
+        await store.aclose()
+    assert ticks > 5
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_shared_across_workers_via_redis_protocol():
+    server, port = await _fake_redis_server()
+    assert _encode(("GET", "k")) == b"*2\r\n$3\r\nGET\r\n$1\r\nk\r\n"
+    stores = [RedisStore(f"redis://127.0.0.1:{port}/0", prefix="t:") for _ in "ab"]
+    workers = [RateLimiter(rate=3, per_seconds=60, shared=store) for store in stores]
+    try:
+        await workers[0].check("1.2.3.4")
+        await workers[1].check("1.2.3.4")
+        await workers[0].check("1.2.3.4")
+        with pytest.raises(HTTPException):
+            await workers[1].check("1.2.3.4")
+        # Rejections are not counted; other clients are unaffected.
+        assert await stores[0].get(f"ratelimit:1.2.3.4:{int(time.time() // 60)}")
+        await workers[1].check("5.6.7.8")
+    finally:
+        for store in stores:
+            await store.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_survey_cache_fills_from_entries_published_by_another_worker(tmp_path):
+    store = MmapStore(str(tmp_path / "state"), slots=64, value_size=4096)
+    writer = SurveyCache(shared=store)
+    reader = SurveyCache(shared=MmapStore(store.path, slots=64, value_size=4096))
+    payload = {"title": "Cafe", "questions": []}
+
+    entry = writer.put("abc", "hash-1", payload)
+    await writer.flush()
+
+    assert reader.get_by_hash("hash-1") is None
+    assert await reader.fetch_by_hash("hash-1") == payload
+    shared_entry = reader.entry("abc")
+    assert shared_entry is not None and shared_entry.etag == entry.etag
+    assert await reader.fetch("missing") is None
+
+    # Invalidation (e.g. by retention) reaches the shared store too.
+    await writer.invalidate("abc", "hash-1")
+    reader.clear()
+    assert await reader.fetch_by_hash("hash-1") is None
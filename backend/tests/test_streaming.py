@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import event as sa_event
+
+from app.db import get_session_factory
+from app.llm.providers import MockProvider, OpenAIProvider
+from app.llm.streaming import IncrementalSurveyParser
+from app.services.survey_service import write_behind
+from app.utils.cache import survey_cache
+from app.utils.metrics import STREAM_FIRST_QUESTION_SECONDS
+
+
+def test_parser_emits_each_question_as_soon_as_it_closes():
+    doc = '{"title": "Cafe {survey}", "questions": [{"text": "a"}, {"text": "b"}]}'
+    parser = IncrementalSurveyParser()
+    events = []
+    for idx, ch in enumerate(doc):
+        for event in parser.feed(ch):
+            events.append((idx, event))
+
+    assert [(e.kind, e.value) for _, e in events] == [
+        ("field", "Cafe {survey}"),
+        ("question", {"text": "a"}),
+        ("question", {"text": "b"}),
+    ]
+    assert events[1][0] == doc.index("}, {")
+    assert parser.done
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_normalizes_questions_incrementally():
+    content = json.dumps(
+        {
+            "title": "Cafe survey",
+            "questions": [
+                {"question": "How was it?", "type": "Rating", "scale": 5},
+                {"text": "Anything else?", "type": "open"},
+            ],
+        }
+    )
+    lines = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": content[i : i + 7]}}]})
+        for i in range(0, len(content), 7)
+    ]
+    body = "\n\n".join(lines + ["data: [DONE]"]) + "\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = OpenAIProvider("sk-test", client=client)
+    events = [e async for e in provider.stream("cafe feedback")]
+    await provider.aclose()
+
+    assert [e["type"] for e in events] == ["title", "question", "question", "survey"]
+    assert events[1]["question"]["type"] == "rating"
+    assert events[1]["question"]["scale"]["max"] == 5
+    survey = events[-1]["survey"]
+    assert survey["questions"] == [events[1]["question"], events[2]["question"]]
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_emits_ndjson_and_persists(app, client):
+    engine = app.dependency_overrides[get_session_factory]().kw["bind"]
+    checked_out: list[int] = []
+    sa_event.listen(engine.sync_engine, "checkout", lambda *a: checked_out.append(1))
+    sa_event.listen(engine.sync_engine, "checkin", lambda *a: checked_out.append(-1))
+
+    payload = {"description": "streamed onboarding survey"}
+    first_questions = STREAM_FIRST_QUESTION_SECONDS.count()
+    resp = await client.post("/api/surveys/generate:stream", json=payload)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert events[0]["type"] == "title"
+    assert {e["type"] for e in events[1:-1]} == {"question"}
+    assert events[-1]["type"] == "survey" and events[-1]["cache_hit"] is False
+    assert STREAM_FIRST_QUESTION_SECONDS.count() == first_questions + 1
+    # Every connection used by the stream has been returned to the pool.
+    assert checked_out and sum(checked_out) == 0
+
+    again = await client.post("/api/surveys/generate", json=payload)
+    assert again.status_code == 200
+    assert again.json()["id"] == events[-1]["survey"]["id"]
+    assert len(again.json()["questions"]) == len(events) - 2
+
+
+class CountingProvider(MockProvider):
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__()
+        self.calls = 0
+        self.fail = fail
+
+    async def generate(self, description: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("upstream said: secret-key-123 rejected")
+        return await super().generate(description)
+
+
+async def _stream_events(client, description: str) -> list[dict]:
+    resp = await client.post(
+        "/api/surveys/generate:stream", json={"description": description}
+    )
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_stream_answers_briefs_queued_for_write_behind(app, client, monkeypatch):
+    import app.routers.surveys as surveys_module
+
+    monkeypatch.setattr(write_behind, "enabled", True)
+    monkeypatch.setattr(write_behind, "flush_interval", 60.0)
+    provider = CountingProvider()
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    created = await client.post(
+        "/api/surveys/generate", json={"description": "queued stream brief"}
+    )
+    assert write_behind.depth() == 1
+    survey_cache.clear()
+    events = await _stream_events(client, "queued stream brief")
+
+    assert [e["type"] for e in events] == ["survey"]
+    assert events[0]["cache_hit"] is True
+    assert events[0]["survey"]["id"] == created.json()["id"]
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_joins_a_generation_in_flight(app, client):
+    import app.routers.surveys as surveys_module
+
+    provider = CountingProvider()
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    single, events = await asyncio.gather(
+        client.post("/api/surveys/generate", json={"description": "joined brief"}),
+        _stream_events(client, "joined brief"),
+    )
+
+    assert provider.calls == 1
+    assert events[-1]["type"] == "survey"
+    assert events[-1]["survey"]["id"] == single.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_stream_errors_are_generic(app, client):
+    import app.routers.surveys as surveys_module
+
+    provider = CountingProvider(fail=True)
+    app.dependency_overrides[surveys_module.get_provider] = lambda: provider
+
+    events = await _stream_events(client, "failing stream brief")
+
+    assert events == [{"type": "error", "detail": "generation failed"}]
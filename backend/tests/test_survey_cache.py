@@ -0,0 +1,41 @@
+import pytest
+
+from app.utils.cache import SurveyCache, survey_cache
+
+
+def test_survey_cache_evicts_by_count_bytes_and_ttl(monkeypatch):
+    cache = SurveyCache(max_entries=2, max_bytes=10_000)
+    cache.put("a", "ha", {"v": 1})
+    cache.put("b", "hb", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "a" becomes most recently used
+    cache.put("c", "hc", {"v": 3})
+    assert cache.get_by_hash("hb") is None
+    assert cache.get_by_hash("ha") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+    small = SurveyCache(max_entries=10, max_bytes=20)
+    small.put("a", "ha", {"text": "x" * 5})
+    small.put("b", "hb", {"text": "y" * 5})
+    assert len(small) == 1 and small.get("b") is not None
+
+    now = [100.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now[0])
+    ttl = SurveyCache(ttl_seconds=5)
+    ttl.put("a", "ha", {"v": 1})
+    now[0] += 6
+    assert ttl.get("a") is None
+    assert ttl.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hot_brief_is_served_from_cache(client):
+    payload = {"description": "hot brief served from memory"}
+    first = await client.post("/api/surveys/generate", json=payload)
+    assert len(survey_cache) == 1
+    hits_before = survey_cache.hits
+
+    second = await client.post("/api/surveys/generate", json=payload)
+
+    assert second.status_code == 200 and second.headers["X-Cache-Hit"] == "1"
+    assert second.json() == first.json()
+    assert survey_cache.hits == hits_before + 1
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Survey
+from app.services.survey_service import new_survey, write_behind
+from app.utils.cache import survey_cache
+from app.utils.hashing import hash_description
+from app.utils.metrics import WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_ROWS
+
+
+async def _stored_count() -> int:
+    async with write_behind.session_factory() as session:
+        return (await session.execute(select(func.count(Survey.id)))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_new_surveys_are_served_from_the_queue_until_flushed(client, monkeypatch):
+    monkeypatch.setattr(write_behind, "enabled", True)
+    monkeypatch.setattr(write_behind, "flush_interval", 60.0)
+    brief = {"description": "Employee onboarding feedback"}
+    flushes = WRITE_BEHIND_FLUSH_SECONDS.count()
+
+    created = await client.post("/api/surveys/generate", json=brief)
+    assert created.status_code == 201
+    survey_id = created.json()["id"]
+    assert write_behind.depth() == 1
+    assert await _stored_count() == 0
+
+    # Not in the database yet: both lookups are answered from the queue.
+    survey_cache.clear()
+    again = await client.post("/api/surveys/generate", json=brief)
+    assert again.status_code == 200 and again.json()["id"] == survey_id
+    survey_cache.clear()
+    fetched = await client.get(f"/api/surveys/{survey_id}")
+    assert fetched.status_code == 200 and fetched.json() == created.json()
+
+    assert await write_behind.drain() == 1
+    assert write_behind.depth() == 0
+    assert await _stored_count() == 1
+    metrics = (await client.get("/metrics")).text
+    assert f"survey_write_behind_flush_seconds_count {flushes + 1}" in metrics
+    assert "survey_write_behind_depth 0" in metrics
+
+
+@pytest.mark.asyncio
+async def test_full_queue_falls_back_to_synchronous_insert(client, monkeypatch):
+    monkeypatch.setattr(write_behind, "enabled", True)
+    monkeypatch.setattr(write_behind, "max_pending", 0)
+    rejected = WRITE_BEHIND_ROWS.value(outcome="rejected")
+
+    resp = await client.post(
+        "/api/surveys/generate", json={"description": "Gym membership survey"}
+    )
+    assert resp.status_code == 201
+    assert write_behind.depth() == 0
+    assert await _stored_count() == 1
+    assert WRITE_BEHIND_ROWS.value(outcome="rejected") == rejected + 1
+
+
+@pytest.mark.asyncio
+async def test_conflicting_flush_keeps_the_returned_id_valid(client, monkeypatch):
+    monkeypatch.setattr(write_behind, "enabled", True)
+    monkeypatch.setattr(write_behind, "flush_interval", 60.0)
+    description = "Conference catering survey"
+    conflicts = WRITE_BEHIND_ROWS.value(outcome="conflict")
+
+    created = await client.post(
+        "/api/surveys/generate", json={"description": description}
+    )
+    survey_id = created.json()["id"]
+    # Meanwhile another worker stores its own survey for the same brief.
+    description_hash = hash_description(description)
+    async with write_behind.session_factory() as session:
+        session.add(
+            new_survey(
+                description,
+                description_hash,
+                "other-worker",
+                {"title": "Winner", "questions": []},
+            )
+        )
+        await session.commit()
+
+    assert await write_behind.drain() == 1
+    assert WRITE_BEHIND_ROWS.value(outcome="conflict") == conflicts + 1
+    assert await _stored_count() == 1
+
+    fetched = await client.get(f"/api/surveys/{survey_id}")
+    assert fetched.status_code == 200 and fetched.json()["title"] == "Winner"